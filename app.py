@@ -3,7 +3,7 @@ Flask Web Application for AI Story Quiz Game
 This application serves the web interface for the quiz game,
 handles user authentication, game sessions, and communication with the game logic.
 """
-from flask import Flask, render_template, request, jsonify, session, Response, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, Response, redirect, url_for, g, stream_with_context
 import json
 import random
 from typing import Dict, List, Optional
@@ -11,17 +11,26 @@ import time
 import secrets
 import logging
 import sys
-from flask_mysqldb import MySQL, MySQLdb
+import MySQLdb
+import MySQLdb.cursors
+from dbutils.pooled_db import PooledDB
 import hashlib
 import re
 import os  # Import the os library
+import pickle
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv  # Import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Import the game classes from game.py
-from game import OllamaStoryQuizGame, OllamaStoryQuizGameWithLevels
+from game import OllamaStoryQuizGame, OllamaStoryQuizGameWithLevels, ollama_health
+
+# Usernames may only contain letters, numbers and underscores.
+# \A...\Z anchors so a trailing newline can't slip past the check the way it can with $.
+_USERNAME_RE = re.compile(r'\A[A-Za-z0-9_]+\Z')
 
 # Configure logging to output information to the console
 logging.basicConfig(level=logging.INFO)
@@ -29,8 +38,15 @@ logger = logging.getLogger(__name__)
 
 # Initialize the Flask application
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)  # Secret key for session management
+# Secret key for session management. Load it from the environment so sessions survive
+# restarts and are valid across every worker process.
+app.secret_key = os.environ.get('SECRET_KEY')
+if not app.secret_key:
+    logger.warning("SECRET_KEY is not set; using a random key. Sessions will not survive a restart.")
+    app.secret_key = secrets.token_hex(16)
 app.config['DEBUG'] = True
+# Debug-only endpoints (e.g. /debug-questions) must be switched on explicitly
+app.config['ENABLE_DEBUG_ENDPOINTS'] = os.environ.get('ENABLE_DEBUG_ENDPOINTS') == '1'
 
 # MySQL configurations - securely loaded from environment variables
 app.config['MYSQL_HOST'] = os.environ.get('MYSQL_HOST')
@@ -38,12 +54,219 @@ app.config['MYSQL_USER'] = os.environ.get('MYSQL_USER')
 app.config['MYSQL_PASSWORD'] = os.environ.get('MYSQL_PASSWORD')
 app.config['MYSQL_DB'] = os.environ.get('MYSQL_DB')
 
+# Connection pool sizing: (cores * 2) + 1 warm connections, with room for bursts on top.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', (os.cpu_count() or 1) * 2 + 1))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 20))
+
+# Initialize the MySQL connection pool. Connections are opened lazily and reused
+# across requests instead of paying the TCP/auth handshake on every request.
+db_pool = PooledDB(
+    creator=MySQLdb,
+    mincached=0,
+    maxcached=DB_POOL_SIZE,
+    maxconnections=DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW,
+    blocking=True,
+    ping=1,  # Check the connection is alive whenever it is taken from the pool
+    host=app.config['MYSQL_HOST'] or 'localhost',
+    user=app.config['MYSQL_USER'],
+    passwd=app.config['MYSQL_PASSWORD'] or '',
+    db=app.config['MYSQL_DB'],
+    charset='utf8mb4',
+)
+
+# Optional Redis support, used to share game sessions between worker processes
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Optional fast JSON encoder for the hottest API endpoints
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional server-side sessions (only used together with Redis)
+try:
+    from flask_session import Session
+except ImportError:
+    Session = None
+
+REDIS_URL = os.environ.get('REDIS_URL')
+GAME_TTL_SECONDS = 3600  # Idle games expire after an hour
+MAX_LOCAL_GAMES = 10000  # Upper bound on games held in process memory
+
+redis_client = None
+if redis and REDIS_URL:
+    redis_client = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(REDIS_URL, max_connections=50))
+    logger.info("Storing game sessions in Redis.")
+
+    if Session is not None:
+        # Keep session data in Redis so only a short signed session ID travels in the cookie
+        app.config.update(SESSION_TYPE='redis', SESSION_REDIS=redis_client, SESSION_USE_SIGNER=True)
+        Session(app)
+
+
+class GameStore:
+    """
+    Holds the active game instances, keyed by game session ID.
+    Games are pickled into Redis when REDIS_URL is configured, so any worker process can serve any
+    request and games survive restarts; otherwise they are kept in this process's memory.
+    Either way, games that sit idle for longer than the TTL are dropped.
+    """
+    def __init__(self, redis_client=None, ttl: int = GAME_TTL_SECONDS, max_local: int = MAX_LOCAL_GAMES):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.max_local = max_local
+        # session_id -> (game, last used); kept in least-recently-used order
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        # Guards _local, which the threaded server reads and writes from several requests at once
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"game:{session_id}"
+
+    def get(self, session_id: Optional[str]) -> Optional[OllamaStoryQuizGame]:
+        """Returns the game for a session ID, or None if there is no such game."""
+        if not session_id:
+            return None
+        if self.redis is None:
+            with self._lock:
+                entry = self._local.get(session_id)
+                if entry is None or time.monotonic() - entry[1] > self.ttl:
+                    return None
+                self._local[session_id] = (entry[0], time.monotonic())
+                self._local.move_to_end(session_id)
+                return entry[0]
+        data = self.redis.get(self._key(session_id))
+        return pickle.loads(data) if data else None
+
+    def save(self, session_id: str, game: OllamaStoryQuizGame) -> None:
+        """Stores a game. Must be called again after the game is modified."""
+        if self.redis is None:
+            with self._lock:
+                self._local[session_id] = (game, time.monotonic())
+                self._local.move_to_end(session_id)
+                self._evict()
+        else:
+            self.redis.setex(self._key(session_id), self.ttl, pickle.dumps(game))
+
+    def delete(self, session_id: Optional[str]) -> None:
+        """Removes a game, if it exists."""
+        if not session_id:
+            return
+        if self.redis is None:
+            with self._lock:
+                self._local.pop(session_id, None)
+        else:
+            self.redis.delete(self._key(session_id))
 
-# Initialize MySQL
-mysql = MySQL(app)
-
-# Global dictionary to store active game instances
-games = {}
+    def _evict(self) -> None:
+        """
+        Drops idle in-memory games (at most once a minute) and the oldest games beyond max_local.
+        The caller must hold the lock.
+        """
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._next_sweep = now + 60
+            for session_id in [sid for sid, (_, last_used) in self._local.items() if now - last_used > self.ttl]:
+                del self._local[session_id]
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Counts in-memory games; always 0 with Redis, where counting would mean scanning every key."""
+        return len(self._local)
+
+
+# Store for active game instances
+games = GameStore(redis_client)
+
+# Short-lived cache for slow-to-compute page data. Entries live in Redis when it is
+# configured, so every worker sees the same data and invalidations; otherwise in memory.
+LEADERBOARD_CACHE_TTL = 30  # seconds; the leaderboard only changes when someone levels up
+PROFILE_CACHE_TTL = 300  # seconds; busted whenever the player's stats change
+LEADERBOARD_CACHE_KEY = 'leaderboard:top10'
+MAX_LOCAL_CACHE_ENTRIES = 10000  # Upper bound on cached values held in process memory
+# key -> (value, expires at); kept in insertion order so the oldest entries are dropped first
+_local_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_local_cache_lock = threading.Lock()
+_local_cache_next_sweep = 0.0
+
+def profile_cache_key(user_id) -> str:
+    """Returns the cache key for a player's profile stats."""
+    return f"profile:{user_id}"
+
+def cache_get(key: str):
+    """Returns a cached value, or None if it is missing or expired."""
+    if redis_client is not None:
+        data = redis_client.get(key)
+        return json.loads(data) if data else None
+    with _local_cache_lock:
+        entry = _local_cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[1]:
+            _local_cache.pop(key, None)
+            return None
+        return entry[0]
+
+def cache_set(key: str, value, ttl: int) -> None:
+    """Caches a JSON-serializable value for ttl seconds."""
+    global _local_cache_next_sweep
+    if redis_client is not None:
+        redis_client.setex(key, ttl, json.dumps(value, default=str))
+    else:
+        now = time.monotonic()
+        with _local_cache_lock:
+            _local_cache[key] = (value, now + ttl)
+            _local_cache.move_to_end(key)
+            # Drop expired entries at most once a minute, so values nobody reads again don't pile up
+            if now >= _local_cache_next_sweep:
+                _local_cache_next_sweep = now + 60
+                for expired in [k for k, (_, expires_at) in _local_cache.items() if now >= expires_at]:
+                    del _local_cache[expired]
+            while len(_local_cache) > MAX_LOCAL_CACHE_ENTRIES:
+                _local_cache.popitem(last=False)
+
+def cache_delete(*keys: str) -> None:
+    """Removes cached values so the next read recomputes them."""
+    if redis_client is not None:
+        redis_client.delete(*keys)
+    else:
+        with _local_cache_lock:
+            for key in keys:
+                _local_cache.pop(key, None)
+
+def get_db():
+    """
+    Returns a pooled database connection for the current request, or None if the database is unreachable.
+    The connection is checked out once per request and returned to the pool on teardown.
+    """
+    if 'db' not in g:
+        try:
+            g.db = db_pool.connection()
+        except MySQLdb.Error as e:
+            logger.error(f"Could not get a database connection from the pool: {e}")
+            g.db = None
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Returns the request's database connection to the pool."""
+    db = g.pop('db', None)
+    if db is not None:
+        db.close()
+
+def fast_jsonify(payload: Dict, status: int = 200) -> Response:
+    """Serializes a JSON response with orjson when it is installed, falling back to jsonify."""
+    if orjson is None:
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
 
 # --- ALL OTHER FUNCTIONS REMAIN THE SAME ---
 @app.context_processor
@@ -75,32 +298,31 @@ def login():
 
         try:
             # RECTIFIED: Added a check to ensure the database connection is alive.
-            if not mysql or not hasattr(mysql, 'connection') or not mysql.connection:
+            db = get_db()
+            if db is None:
                 logger.error("Database connection not available during login.")
                 return render_template('index.html', msg='Error: Could not connect to the database.')
 
-            cursor = mysql.connection.cursor(MySQLdb.cursors.DictCursor) # type: ignore
-            cursor.execute('SELECT * FROM accounts WHERE username = %s', (username,))
+            cursor = db.cursor()
+            cursor.execute('SELECT id, username FROM accounts WHERE username = %s', (username,))
             account = cursor.fetchone()
 
             if account:
                 # Create session data upon successful login
                 session['loggedin'] = True
-                session['id'] = account['id']
-                session['username'] = account['username']
+                session['id'] = account[0]
+                session['username'] = account[1]
                 return redirect(url_for('index'))
-            elif re.match(r'^[A-Za-z0-9_]+$', username):
+            elif _USERNAME_RE.match(username):
                 # If account doesn't exist, create a new one (no password/email)
                 # Initialize stats for the new user.
                 cursor.execute('INSERT INTO accounts (username, password, email, total_questions_answered, total_correct_answers) VALUES (%s, %s, %s, 0, 0)', (username, '', ''))
-                mysql.connection.commit()
+                db.commit()
                 
-                # Log the new user in
-                cursor.execute('SELECT * FROM accounts WHERE username = %s', (username,))
-                new_account = cursor.fetchone()
+                # Log the new user in, using the auto-generated ID from the insert
                 session['loggedin'] = True
-                session['id'] = new_account['id'] # type: ignore
-                session['username'] = new_account['username'] # type: ignore
+                session['id'] = cursor.lastrowid
+                session['username'] = username
                 return redirect(url_for('index'))
             else:
                 return render_template('index.html', msg='Username must contain only letters, numbers, and underscores!')
@@ -116,7 +338,8 @@ def login():
 
 @app.route('/logout')
 def logout():
-    """Logs the user out by clearing the session."""
+    """Logs the user out by clearing the session and discarding their active game."""
+    games.delete(session.pop('session_id', None))
     session.pop('loggedin', None)
     session.pop('id', None)
     session.pop('username', None)
@@ -129,30 +352,35 @@ def leaderboard():
         return redirect(url_for('index'))
 
     try:
+        # Serve the cached top-10 if it is still fresh
+        cached_rows = cache_get(LEADERBOARD_CACHE_KEY)
+        if cached_rows is not None:
+            return render_template('leaderboard.html', leaderboard_data=cached_rows)
+
         # RECTIFIED: Added a check to ensure the database connection is alive.
-        if not mysql or not hasattr(mysql, 'connection') or not mysql.connection:
+        db = get_db()
+        if db is None:
             logger.error("Database connection not available for leaderboard.")
             return render_template('error.html', error="Database connection is currently unavailable.")
 
-        cursor = mysql.connection.cursor(MySQLdb.cursors.DictCursor) # type: ignore
-        # This query finds the maximum level for each user and joins with the accounts table
-        # to get their username, then orders them to find the top 10.
+        cursor = db.cursor(MySQLdb.cursors.DictCursor) # type: ignore
+        # accounts.highest_level is kept up to date by check_level_up, so the top 10
+        # comes straight off the (highest_level, username) index with no GROUP BY.
         query = """
             SELECT
-                a.username,
-                MAX(up.level) AS highest_level
+                username,
+                highest_level
             FROM
-                user_progress up
-            JOIN
-                accounts a ON up.user_id = a.id
-            GROUP BY
-                up.user_id, a.username
+                accounts
+            WHERE
+                highest_level > 0
             ORDER BY
                 highest_level DESC
             LIMIT 10;
         """
         cursor.execute(query)
         leaderboard_data = cursor.fetchall()
+        cache_set(LEADERBOARD_CACHE_KEY, list(leaderboard_data), LEADERBOARD_CACHE_TTL)
         return render_template('leaderboard.html', leaderboard_data=leaderboard_data)
     except Exception as e:
         logger.error(f"Error fetching leaderboard: {e}")
@@ -165,28 +393,32 @@ def profile():
         return redirect(url_for('index'))
 
     try:
+        user_id = session['id']
+
+        # Serve cached stats if nothing has changed since they were computed.
+        # The username is not cached; it always comes from the session.
+        cached = cache_get(profile_cache_key(user_id))
+        if cached is not None:
+            return render_template('profile.html',
+                                   stats=dict(cached['stats'], username=session['username']),
+                                   game_history=cached['game_history'])
+
         # RECTIFIED: Added a check to ensure the database connection is alive.
-        if not mysql or not hasattr(mysql, 'connection') or not mysql.connection:
+        db = get_db()
+        if db is None:
             logger.error("Database connection not available for profile page.")
             return render_template('error.html', error="Database connection is currently unavailable.")
 
-        user_id = session['id']
-        cursor = mysql.connection.cursor(MySQLdb.cursors.DictCursor) # type: ignore
-
-        # Get highest level from user_progress
-        cursor.execute('SELECT MAX(level) AS highest_level FROM user_progress WHERE user_id = %s', (user_id,))
-        progress = cursor.fetchone()
-        highest_level = progress['highest_level'] if progress and progress['highest_level'] is not None else 0
+        cursor = db.cursor()
 
-        # Get total questions and correct answers from accounts
-        cursor.execute('SELECT total_questions_answered, total_correct_answers FROM accounts WHERE id = %s', (user_id,))
-        account_stats = cursor.fetchone()
+        # Get highest level, total questions and correct answers from accounts in one query
+        cursor.execute('SELECT highest_level, total_questions_answered, total_correct_answers FROM accounts WHERE id = %s', (user_id,))
+        account_stats = cursor.fetchone() or (0, 0, 0)
 
         stats = {
-            'username': session['username'],
-            'highest_level': highest_level,
-            'total_questions_answered': account_stats['total_questions_answered'] if account_stats else 0,
-            'total_correct_answers': account_stats['total_correct_answers'] if account_stats else 0,
+            'highest_level': account_stats[0],
+            'total_questions_answered': account_stats[1],
+            'total_correct_answers': account_stats[2],
         }
 
         # Calculate accuracy
@@ -195,7 +427,8 @@ def profile():
         else:
             stats['accuracy'] = 0
 
-        # Get last 5 games from game_history
+        # Get last 5 games from game_history; rows are dicts since the template reads many columns
+        cursor = db.cursor(MySQLdb.cursors.DictCursor) # type: ignore
         cursor.execute("""
             SELECT genre, game_mode, score, total_questions, level, played_at
             FROM game_history
@@ -213,8 +446,10 @@ def profile():
             game['played_date'] = game['played_at'].strftime('%b %d, %Y')
             formatted_history.append(game)
 
+        cache_set(profile_cache_key(user_id), {'stats': stats, 'game_history': formatted_history}, PROFILE_CACHE_TTL)
+
         return render_template('profile.html',
-                               stats=stats,
+                               stats=dict(stats, username=session['username']),
                                game_history=formatted_history)
     except Exception as e:
         logger.error(f"Error fetching profile data: {e}")
@@ -235,6 +470,9 @@ def start_game():
         genre = data.get('genre', 'adventure')
         game_mode = data.get('game_mode', 'classic')
         
+        # Discard the player's previous game; the session will point at the new one
+        games.delete(session.get('session_id'))
+
         # Generate a unique session ID for this game instance
         session_id = secrets.token_hex(8)
         session['session_id'] = session_id
@@ -243,14 +481,15 @@ def start_game():
         level = 1
         if game_mode != 'classic':
             # Fetch the user's progress if in advanced mode
-            if not mysql or not hasattr(mysql, 'connection') or not mysql.connection:
+            db = get_db()
+            if db is None:
                 logger.error("DB connection failed when starting a 'levels' game.")
                 return jsonify({'success': False, 'error': 'Database connection is currently unavailable.'}), 503
-            cursor = mysql.connection.cursor(MySQLdb.cursors.DictCursor)
+            cursor = db.cursor()
             cursor.execute('SELECT level FROM user_progress WHERE user_id = %s ORDER BY level DESC LIMIT 1', (user_id,))
             progress = cursor.fetchone()
             if progress:
-                level = progress['level'] + 1
+                level = progress[0] + 1
         
         # Create the appropriate game instance based on the selected mode
         if game_mode == 'classic':
@@ -258,17 +497,16 @@ def start_game():
         else:
             game = OllamaStoryQuizGameWithLevels("gemma:2b", genre=genre, start_level=level)
         
-        # Store the game instance in the global dictionary
-        games[session_id] = game
-        
         # Check the connection to Ollama before starting the game
         ollama_connected = game.check_ollama_connection()
         logger.info(f"Ollama connection: {ollama_connected}")
 
         if not ollama_connected:
             logger.error("Ollama connection failed. Cannot start game.")
-            del games[session_id]  # Clean up the created game instance
             return jsonify({'success': False, 'error': 'Cannot connect to the AI service (Ollama). Please ensure it is running.'}), 503
+
+        # Store the game instance
+        games.save(session_id, game)
         
         game_url = url_for('game_page', session_id=session_id, _external=True)
 
@@ -293,11 +531,10 @@ def new_round():
         session_id = session.get('session_id')
         logger.info(f"New round for session: {session_id}")
         
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
-        game = games[session_id]
-        
         # Generate the story
         story = game.generate_story()
         
@@ -311,13 +548,15 @@ def new_round():
         if not questions:
             logger.error("Failed to generate questions")
             return jsonify({'success': False, 'error': 'Failed to generate questions'}), 500
+
+        games.save(session_id, game)  # Persist the updated story history
         
         return jsonify({
             'success': True,
             'story': story,
             'questions': questions,
-            'word_count': len(story.split()),
-            'ollama_connected': game.check_ollama_connection()
+            'word_count': len(game.current_story_words),
+            'ollama_connected': True  # The story and quiz were just generated by Ollama
         })
         
     except Exception as e:
@@ -329,15 +568,20 @@ def generate_story_stream():
     """API endpoint to stream a newly generated story to the client."""
     try:
         session_id = session.get('session_id')
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
-        game = games[session_id]
         word_count = getattr(game, 'story_word_limit', 150)
         prompt = f"Write a complete story of about {word_count} words in the '{game.genre}' genre."
         
-        # Return a streaming response
-        return Response(game.generate_story_stream(prompt, word_count + 100), mimetype='text/plain')
+        # Return a streaming response. stream_with_context keeps the request context alive while the
+        # generator runs, and the headers stop proxies (e.g. nginx) from buffering the chunks.
+        return Response(
+            stream_with_context(game.generate_story_stream(prompt, word_count + 100)),
+            mimetype='text/plain',
+            headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'}
+        )
 
     except Exception as e:
         logger.error(f"Error in story stream: {str(e)}")
@@ -349,16 +593,17 @@ def generate_story():
     try:
         session_id = session.get('session_id')
         
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
-        game = games[session_id]
         story = game.generate_story()
+        games.save(session_id, game)  # Persist the updated story history
         
         return jsonify({
             'success': True,
             'story': story,
-            'word_count': len(story.split()),
+            'word_count': len(game.current_story_words),
         })
         
     except Exception as e:
@@ -371,7 +616,8 @@ def generate_quiz():
     try:
         session_id = session.get('session_id')
         
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
         data = request.get_json()
@@ -380,7 +626,6 @@ def generate_quiz():
         if not story:
             return jsonify({'success': False, 'error': 'No story provided'}), 400
         
-        game = games[session_id]
         questions = game.generate_quiz_questions(story)
         
         return jsonify({
@@ -398,44 +643,20 @@ def submit_answer():
     try:
         session_id = session.get('session_id')
         
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
         data = request.get_json()
         if not data:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
         
-        game = games[session_id]
-        is_correct = data.get('is_correct', False)
-        user_id = session['id']
+        # Update scores. The account totals are buffered on the game and written
+        # to the database once per round by record_game instead of once per answer.
+        game.record_answer(bool(data.get('is_correct', False)))
+        games.save(session_id, game)
         
-        # RECTIFIED: Added a check to ensure the database connection is alive.
-        if not mysql or not hasattr(mysql, 'connection') or not mysql.connection:
-            logger.error("Database connection not available for submitting answer.")
-            return jsonify({'success': False, 'error': 'Database connection is currently unavailable.'}), 503
-
-        cursor = mysql.connection.cursor()
-        # Update scores
-        if is_correct:
-            game.score += 1
-            if isinstance(game, OllamaStoryQuizGameWithLevels):
-                game.level_score += 1
-            # Update total correct answers in the database
-            cursor.execute('UPDATE accounts SET total_correct_answers = total_correct_answers + 1 WHERE id = %s', (user_id,))
-
-        # Update total questions answered in the database
-        cursor.execute('UPDATE accounts SET total_questions_answered = total_questions_answered + 1 WHERE id = %s', (user_id,))
-        mysql.connection.commit()
-        
-        game.questions_answered += 1
-        
-        return jsonify({
-            'success': True,
-            'score': game.score,
-            'questions_answered': game.questions_answered,
-            'level': getattr(game, 'level', None),
-            'level_score': getattr(game, 'level_score', None)
-        })
+        return fast_jsonify({'success': True, **game.to_status_dict()})
         
     except Exception as e:
         logger.error(f"Error processing answer: {str(e)}")
@@ -447,18 +668,15 @@ def get_score():
     try:
         session_id = session.get('session_id')
         
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
-        game = games[session_id]
         accuracy = (game.score / game.questions_answered) * 100 if game.questions_answered > 0 else 0
         
-        return jsonify({
+        return fast_jsonify({
             'success': True,
-            'score': game.score,
-            'level': getattr(game, 'level', None),
-            'level_score': getattr(game, 'level_score', None),
-            'questions_answered': game.questions_answered,
+            **game.to_status_dict(),
             'accuracy': round(accuracy, 1)
         })
         
@@ -474,12 +692,11 @@ def check_level_up():
     try:
         session_id = session.get('session_id')
         
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
-        game = games[session_id]
-        
-        if not isinstance(game, OllamaStoryQuizGameWithLevels):
+        if not game.has_levels:
             return jsonify({'success': True, 'leveled_up': False})
         
         leveled_up = False
@@ -493,18 +710,23 @@ def check_level_up():
             user_id = session['id']
 
             # Save progress to the database
-            if not mysql or not hasattr(mysql, 'connection') or not mysql.connection:
+            db = get_db()
+            if db is None:
                 logger.error("DB connection failed during level-up check.")
                 return jsonify({'success': False, 'error': 'Database connection is currently unavailable.'}), 503
 
-            cursor = mysql.connection.cursor()
+            # Record the level and the account's denormalized highest level in one transaction
+            cursor = db.cursor()
             cursor.execute('INSERT INTO user_progress (user_id, level) VALUES (%s, %s)', (user_id, previous_level))
-            mysql.connection.commit()
+            cursor.execute('UPDATE accounts SET highest_level = GREATEST(highest_level, %s) WHERE id = %s', (previous_level, user_id))
+            db.commit()
+            cache_delete(LEADERBOARD_CACHE_KEY, profile_cache_key(user_id))  # Top-10 and highest level may have changed
             
             hint_awarded = game.advance_level()
             message = f"🎉 LEVEL UP! Welcome to Level {game.level}!"
             if hint_awarded: message += " You earned a new hint!"
             logger.info(f"Player advanced from level {previous_level} to {game.level}")
+            games.save(session_id, game)
         else:
             remaining = 2 - game.level_score
             message = f"Need {remaining} more correct answer(s) to advance to the next level."
@@ -530,13 +752,13 @@ def use_hint():
     """API endpoint to use a hint."""
     try:
         session_id = session.get('session_id')
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
-        game = games[session_id]
-        
         if hasattr(game, 'hints') and game.hints > 0:
             game.hints -= 1
+            games.save(session_id, game)
             return jsonify({
                 'success': True,
                 'hints_remaining': game.hints
@@ -556,12 +778,11 @@ def skip_level():
     """API endpoint to skip the current level using hints."""
     try:
         session_id = session.get('session_id')
-        if not session_id or session_id not in games:
+        game = games.get(session_id)
+        if game is None:
             return jsonify({'success': False, 'error': 'No active game session'}), 400
         
-        game = games[session_id]
-        
-        if not isinstance(game, OllamaStoryQuizGameWithLevels):
+        if not game.has_levels:
             return jsonify({'success': False, 'error': 'Skip level is only available in Progressive Challenge mode.'}), 400
         
         if game.hints >= 2:
@@ -572,6 +793,7 @@ def skip_level():
             if hint_awarded_on_skip:
                 message += " You earned 1 hint back!"
 
+            games.save(session_id, game)
             return jsonify({
                 'success': True,
                 'message': message,
@@ -587,39 +809,71 @@ def skip_level():
 
 @app.route('/api/record-game', methods=['POST'])
 def record_game():
-    """API endpoint to record the result of a completed game round."""
+    """
+    API endpoint to record the result of a completed game round.
+    Accepts a single round, or {"rounds": [...]} to record several rounds at once.
+    """
     if 'loggedin' not in session or 'id' not in session:
         return jsonify({'success': False, 'error': 'User not logged in'}), 401
 
+    db = None
     try:
         # RECTIFIED: Added a check to ensure the database connection is alive.
-        if not mysql or not hasattr(mysql, 'connection') or not mysql.connection:
+        db = get_db()
+        if db is None:
             logger.error("Database connection not available for recording game.")
             return jsonify({'success': False, 'error': 'Database connection is currently unavailable.'}), 503
 
         data = request.get_json()
         if not data:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Invalid game data'}), 400
 
         user_id = session['id']
-        genre = data.get('genre')
-        game_mode = data.get('game_mode')
-        score = data.get('score')
-        total_questions = data.get('total_questions')
-        level = data.get('level') # This will be None for classic mode
-
-        if not all([genre, game_mode, score is not None, total_questions is not None]):
-            return jsonify({'success': False, 'error': 'Missing required game data'}), 400
-
-        cursor = mysql.connection.cursor()
-        cursor.execute("""
+        rounds = data.get('rounds') or [data]
+        if not isinstance(rounds, list) or not all(isinstance(r, dict) for r in rounds):
+            return jsonify({'success': False, 'error': "'rounds' must be a list of game rounds"}), 400
+        rows = []
+        for game_round in rounds:
+            genre = game_round.get('genre')
+            game_mode = game_round.get('game_mode')
+            score = game_round.get('score')
+            total_questions = game_round.get('total_questions')
+            level = game_round.get('level') # This will be None for classic mode
+
+            if not all([genre, game_mode, score is not None, total_questions is not None]):
+                return jsonify({'success': False, 'error': 'Missing required game data'}), 400
+            rows.append((user_id, genre, game_mode, score, total_questions, level))
+
+        # All writes below share one transaction, so InnoDB flushes its log once per request
+        cursor = db.cursor()
+        cursor.executemany("""
             INSERT INTO game_history (user_id, genre, game_mode, score, total_questions, level)
             VALUES (%s, %s, %s, %s, %s, %s)
-        """, (user_id, genre, game_mode, score, total_questions, level))
-        mysql.connection.commit()
+        """, rows)
+
+        # Flush the answer totals buffered by submit_answer
+        session_id = session.get('session_id')
+        game = games.get(session_id)
+        if game and game.pending_answered:
+            cursor.execute(
+                'UPDATE accounts SET total_questions_answered = total_questions_answered + %s, '
+                'total_correct_answers = total_correct_answers + %s WHERE id = %s',
+                (game.pending_answered, game.pending_correct, user_id)
+            )
+        db.commit()
+        cache_delete(profile_cache_key(user_id))
+
+        if game:
+            game.pending_answered = 0
+            game.pending_correct = 0
+            games.save(session_id, game)
 
         return jsonify({'success': True, 'message': 'Game recorded.'})
     except Exception as e:
+        if db is not None:
+            db.rollback()
         logger.error(f"Error recording game: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -628,20 +882,12 @@ def reset_game():
     """API endpoint to reset the current game state."""
     try:
         session_id = session.get('session_id')
+        game = games.get(session_id)
         
-        if session_id and session_id in games:
-            game = games[session_id]
-            
+        if game is not None:
             # Reset game state to initial values
-            game.score = 0
-            game.questions_answered = 0
-            game.used_stories.clear()
-            
-            if hasattr(game, 'level'):
-                game.level = 1
-                game.level_score = 0
-                game.story_word_limit = 100
-                game.num_questions_per_round = 3
+            game.reset()
+            games.save(session_id, game)
         
         return jsonify({
             'success': True,
@@ -661,36 +907,53 @@ def game_page(session_id=None):
 
     session['session_id'] = session_id # Ensure session is aware of the ID from the URL
     
-    if not session_id or session_id not in games:
+    game = games.get(session_id)
+    if game is None:
         return render_template('error.html', 
                              error="No active game session. Please start a new game.")
     
-    game = games[session_id]
-    
     return render_template('game.html', game=game)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """A simple health check endpoint."""
+    payload = {'status': 'healthy'}
+    # The session count is only cheap for the in-memory store, so it is left out when games live in Redis
+    if games.redis is None:
+        payload['active_sessions'] = len(games)
+    return fast_jsonify(payload)
+
+@app.route('/api/health-ollama', methods=['GET'])
+def health_check_ollama():
+    """Reports whether the Ollama service is reachable, for clients that want to poll it."""
     return jsonify({
-        'status': 'healthy',
-        'active_sessions': len(games),
+        'ollama_connected': ollama_health.check(),
     })
 
+# Game instance shared by debug requests; only its pure question-generation helpers are used
+_debug_game = None
+
+def get_debug_game() -> OllamaStoryQuizGame:
+    """Returns the shared game instance used by the debug endpoints, creating it on first use."""
+    global _debug_game
+    if _debug_game is None:
+        _debug_game = OllamaStoryQuizGame()
+    return _debug_game
+
 @app.route('/debug-questions')
 def debug_questions():
     """A debug endpoint to test the question generation logic."""
-    if not app.config['DEBUG']:
-        return jsonify({'error': 'Debug mode disabled'}), 403
+    if not app.config['ENABLE_DEBUG_ENDPOINTS']:
+        return jsonify({'error': 'Debug endpoints disabled'}), 403
     
-    test_game = OllamaStoryQuizGame()
+    test_game = get_debug_game()
     test_story = "Alice found a mysterious golden key in her grandmother's garden. She used it to open an old wooden chest buried under the rose bush. Inside, she discovered a map leading to a hidden treasure cave in the nearby mountains."
     elements = test_game.extract_story_elements(test_story)
     questions = test_game.generate_unique_questions(test_story, elements)
     
     return jsonify({
         'test_story': test_story,
-        'extracted_elements': elements,
+        'extracted_elements': {k: v for k, v in elements.items() if k != 'story_words_set'},
         'unique_questions': questions,
         'question_count': len(questions)
     })
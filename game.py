@@ -1,10 +1,20 @@
 # game.py
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import random
 import time
 import re
-from typing import List, Dict, Set, Optional, Iterator
+import itertools
+import zlib
+import hashlib
+from array import array
+import sys
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Set, Optional, Iterator, Deque, Tuple, Sequence, Callable
 
 # Optional spaCy usage (gracefully falls back if not installed)
 try:
@@ -15,9 +25,107 @@ except (ImportError, OSError):
     print("To enable: pip install spacy && python -m spacy download en_core_web_sm")
     nlp = None
 
+# Optional fast JSON parser for Ollama responses
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Optional single-keypress console input: msvcrt on Windows, termios/tty elsewhere
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+try:
+    import termios
+    import tty
+except ImportError:
+    termios = tty = None
+
 # --- Constants ---
 # Base URL for the Ollama API
 OLLAMA_BASE_URL = "http://localhost:11434"
+# How long Ollama keeps the model loaded after a request, so the next story doesn't pay the load time
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Shared HTTP session for all games, so keep-alive connections to Ollama are reused
+# across requests instead of opening a new TCP connection for every call.
+_ollama_session = requests.Session()
+_ollama_session.mount("http://", HTTPAdapter(
+    pool_connections=20, pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+
+# Worker threads for Ollama attempts that are raced against each other (see generate_story and
+# generate_quiz_questions). Ollama only runs them side by side when started with OLLAMA_NUM_PARALLEL > 1.
+_ollama_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ollama")
+
+
+def _can_read_keys() -> bool:
+    """
+    Returns whether answers can be read as single keypresses; piped input falls back to input().
+    """
+    return sys.stdin.isatty() and (msvcrt is not None or termios is not None)
+
+
+def _getch() -> str:
+    """
+    Reads one keypress from the terminal without waiting for Enter.
+    """
+    if msvcrt is not None:
+        ch = msvcrt.getwch()
+    else:
+        fd = sys.stdin.fileno()
+        old_attrs = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            ch = sys.stdin.read(1)
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
+    if ch == '\x03':  # Ctrl+C arrives as a character on Windows
+        raise KeyboardInterrupt
+    if not ch:
+        raise EOFError
+    return ch
+
+
+class OllamaHealth:
+    """
+    Remembers whether the Ollama service is reachable, shared by every game.
+    A successful check is trusted for a few seconds; a failed one is remembered for longer,
+    so a dead Ollama server isn't probed (and waited on) by every incoming request.
+    Successful generations also count as checks, so an active server is rarely probed at all.
+    """
+    def __init__(self, ok_ttl: float = 10.0, fail_ttl: float = 30.0):
+        self.ok_ttl = ok_ttl
+        self.fail_ttl = fail_ttl
+        self.ok = False
+        self.expires_at = 0.0
+
+    def check(self) -> bool:
+        """
+        Returns the cached status while it is fresh, otherwise probes Ollama's /api/tags.
+        """
+        if time.monotonic() < self.expires_at:
+            return self.ok
+        try:
+            r = _ollama_session.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
+            ok = r.status_code == 200
+        except requests.RequestException:
+            ok = False
+        self.record(ok)
+        return ok
+
+    def record(self, ok: bool) -> None:
+        """
+        Stores the result of a check, keeping failures for longer than successes.
+        """
+        self.ok = ok
+        self.expires_at = time.monotonic() + (self.ok_ttl if ok else self.fail_ttl)
+
+
+ollama_health = OllamaHealth()
 
 # Lists of words for story generation to provide variety
 OBJECT_WORDS = [
@@ -50,12 +158,187 @@ PLACE_WORDS = [
     'tomb', 'tower', 'town', 'tunnel', 'valley', 'village', 'volcano', 'warehouse'
 ]
 
+# Single words are matched against the story's tokens; the few multi-word places need a substring check
+OBJECT_SET = frozenset(OBJECT_WORDS)
+PLACE_SET = frozenset(w for w in PLACE_WORDS if ' ' not in w)
+MULTIWORD_PLACES = [w for w in PLACE_WORDS if ' ' in w]
+
+# Capitalized words that aren't names, and titles that combine with the following name
+NAME_STOPWORDS = frozenset({
+    'The', 'This', 'That', 'They', 'Then', 'There', 'These', 'Those',
+    'When', 'Where', 'What', 'Who', 'Why', 'How', 'And', 'But', 'Or',
+    'So', 'For', 'As', 'At', 'By', 'In', 'On', 'To', 'With', 'From', 'A', 'An'
+})
+NAME_TITLES = frozenset({
+    'Agent', 'Captain', 'Commander', 'Dame', 'Detective', 'Dr', 'General', 'King',
+    'Lady', 'Lord', 'Miss', 'Mr', 'Mrs', 'Ms', 'Officer', 'Prince', 'Princess',
+    'Professor', 'Queen', 'Sergeant', 'Sir'
+})
+
+# Keys of the four answer options, in display order
+ANSWER_LETTERS = 'ABCD'
+
+# Decoy answers and question wording for the built-in question generators, built once at import
+DECOY_NAMES = (
+    'Aarav', 'Aditi', 'Advik', 'Aisha', 'Alex', 'Anika', 'Arjun', 'Aryan',
+    'Ava', 'Benjamin', 'Caleb', 'Casey', 'Charlotte', 'Chloe', 'Cyrus',
+    'Daniel', 'David', 'Diya', 'Elena', 'Elijah', 'Emily', 'Emma', 'Ethan',
+    'Finn', 'Freya', 'Gabriel', 'Grace', 'Harper', 'Henry', 'Ishan',
+    'Isabella', 'Jack', 'James', 'Jasper', 'Jordan', 'Julian', 'Kai',
+    'Kavya', 'Krish', 'Leo', 'Liam', 'Lily', 'Logan', 'Lucas', 'Luna',
+    'Madison', 'Mason', 'Mateo', 'Maya', 'Meera', 'Mia', 'Michael',
+    'Morgan', 'Nitya', 'Noah', 'Nora', 'Oliver', 'Olivia', 'Om', 'Owen',
+    'Penelope', 'Priya', 'Rahul', 'Riley', 'River', 'Riya', 'Rohan',
+    'Sage', 'Sam', 'Samuel', 'Shaan', 'Siya', 'Sofia', 'Sophia', 'Taylor',
+    'Vihaan', 'Vivaan', 'William', 'Wyatt', 'Zara', 'Zoe'
+)
+
+DECOY_ACTIONS = (
+    'argued', 'built', 'calculated', 'climbed', 'cooked', 'cried', 'danced',
+    'decoded', 'drew', 'dreamed', 'escaped', 'flew', 'laughed', 'listened',
+    'meditated', 'negotiated', 'painted', 'played', 'programmed', 'ran',
+    'read', 'repaired', 'sang', 'shouted', 'slept', 'studied', 'surrendered',
+    'swam', 'teleported', 'trained', 'traveled', 'waited', 'walked',
+    'whispered', 'worked', 'wrote', 'stepped', 'entered', 'invited'
+)
+
+DECOY_OBJECTS = (
+    'amulet', 'compass', 'crystal', 'key', 'lantern', 'map', 'mirror', 'orb',
+    'potion', 'ring', 'scroll', 'staff', 'sword', 'talisman', 'treasure chest',
+    'vial', 'wand', 'journal', 'relic'
+)
+
+DECOY_PLACES = (
+    'desert', 'ocean', 'jungle', 'space station', 'volcano', 'swamp', 'canyon',
+    'meadow', 'tundra', 'castle', 'temple', 'city', 'laboratory', 'mansion',
+    'market', 'mine', 'observatory', 'palace', 'ruins', 'tower', 'harbor',
+    'factory'
+)
+
+DECOY_EVENTS = (
+    "They found a glowing key", "A ship sailed away", "A mysterious letter arrived",
+    "The village celebrated", "A bell began to ring", "The sun hid behind clouds",
+    "A storm began to brew", "The hero made a plan", "A map was discovered",
+    "The door creaked open", "A secret was revealed", "They started their journey",
+    "A strange sound was heard", "The group took a rest", "A decision was made",
+    "An old enemy appeared"
+)
+
+NOT_MENTIONED_DECOYS = (
+    'spaceship', 'glacier', 'police station', 'motorcycle', 'astronaut', 'market',
+    'jewel', 'statue', 'bridge', 'robot', 'scepter', 'chronometer'
+)
+
+DECOY_REASONS = (
+    "To find treasure", "To escape danger", "To meet a friend",
+    "To learn a secret", "To show off", "By accident", "Because they were told to"
+)
+
+OPENING_DECOYS = (
+    "On a stormy night", "Deep within the forest", "It was the silence",
+    "In a faraway land", "Long ago, in a kingdom", "No one expected this"
+)
+
+CONTEXT_NOT_MENTIONED = ('spaceship', 'museum', 'robot', 'castle', 'river', 'key', 'lantern', 'dragon', 'market')
+
+NAME_QUESTIONS = (
+    "Who is the main character in the story?",
+    "Which character is central to the tale?",
+    "Who does the story follow?",
+    "Which of the following characters appears in the story?"
+)
+
+ACTION_QUESTIONS = (
+    "What is a key action that takes place in the story?",
+    "Which of these actions is described in the narrative?",
+    "What did someone in the story do?"
+)
+
+OBJECT_QUESTIONS = (
+    "Which important object is mentioned in the story?",
+    "What item plays a role in the narrative?",
+    "Which of these objects appears in the tale?"
+)
+
+PLACE_QUESTIONS = (
+    "Where does the story take place?",
+    "What is the primary setting of the story?",
+    "Which location is described in the narrative?",
+    "The story is set in which of these locations?",
+    "What is the backdrop for this tale?"
+)
+
+SEQUENCE_QUESTIONS = (
+    "Which of the following happened first in the story?",
+    "What event comes earliest in the narrative?",
+    "How does the story begin?",
+    "Which event marks the start of the story?"
+)
+
+NOT_MENTIONED_QUESTIONS = (
+    "Which of the following is NOT mentioned in the story?",
+    "Which item/place/character did the story NOT mention?"
+)
+
+INFERENCE_QUESTIONS = (
+    "Why did {subj} do what they did in the story?",
+    "What is the most likely reason {subj} acted as they did?"
+)
+
+# Quizzes Ollama produced, keyed by a hash of the model and quiz prompt, so asking for a quiz on the
+# same story again skips the model. Stories aren't cached: their prompts carry a random seed on purpose.
+QUIZ_CACHE_SIZE = 256
+_quiz_cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+
+# Stories sharing more than this fraction of their 5-word phrases with a recent story count as repeats
+STORY_SIMILARITY_THRESHOLD = 0.5
+# How many past stories per game are remembered for the repeat check
+RECENT_STORIES_TRACKED = 50
+# Each remembered story is a MinHash signature: the smallest value of MINHASH_SIZE hash functions over
+# its phrases. The fraction of positions two signatures agree on estimates their phrase overlap, and the
+# signature stays the same size however long the story is, which keeps pickled games small.
+MINHASH_SIZE = 64
+_MINHASH_PRIME = (1 << 61) - 1
+# Fixed seed, so signatures stay comparable after a game is pickled into Redis and loaded elsewhere
+_minhash_rng = random.Random(0x5eed)
+_MINHASH_PARAMS = tuple(
+    (_minhash_rng.randrange(1, _MINHASH_PRIME), _minhash_rng.randrange(_MINHASH_PRIME)) for _ in range(MINHASH_SIZE)
+)
+
+# After a transient failure (every attempt came back empty while Ollama still answers health checks)
+# the quiz race runs once more, after waiting QUIZ_RETRY_DELAY seconds plus a little jitter
+QUIZ_RETRY_DELAY = 0.1
+
+# Smallest piece of text sent per write when streaming, so each HTTP chunk carries a useful payload
+STREAM_CHUNK_SIZE = 64
+
+# Regexes used on every story and quiz parse, compiled once at import
+_WORD_RE = re.compile(r'\S+')
+_LOWER_WORD_RE = re.compile(r'[a-z]+')
+_WS_RE = re.compile(r'\s+')
+_SENTENCE_RE = re.compile(r'[^.!?]+')
+_NAME_RE = re.compile(r'\b[A-Z][a-z]{2,}\b')
+_QUESTION_HDR_RE = re.compile(r'^\s*Question\b', re.I)
+_QUESTION_PREFIX_RE = re.compile(r'^\s*Question\s*\d*\s*[:\-]?\s*', re.I)
+_OPTION_RE = re.compile(r'^\s*([A-D])\s*[\)\.\:]\s*(.+)$', re.I)
+_ANSWER_RES = [
+    re.compile(r'Correct Answer\s*[:\-]?\s*([A-D])', re.I),
+    re.compile(r'Correct\s*[:\-]?\s*([A-D])', re.I),
+    re.compile(r'Answer\s*[:\-]?\s*([A-D])', re.I)
+]
+# Inference questions: sentences that give a reason, and reasons that suggest exploring
+_REASON_RE = re.compile(r'\bbecause\b|\bso that\b|\bto\b', re.I)
+_EXPLORE_RE = re.compile(r'explor|discover|find|enter|step', re.I)
+
 
 class OllamaStoryQuizGame:
     """
     A class to represent the core story quiz game logic.
     It handles story and quiz generation using the Ollama service.
     """
+    # Whether this game mode has progressive levels (see OllamaStoryQuizGameWithLevels)
+    has_levels = False
+
     def __init__(self, model_name: str = "gemma:2b", genre: str = "adventure"):
         """
         Initializes the game with a model name, genre, and other default values.
@@ -65,22 +348,81 @@ class OllamaStoryQuizGame:
         self.ollama_api_url = f"{OLLAMA_BASE_URL}/api/generate"
         self.score = 0
         self.questions_answered = 0
-        self.used_stories: Set[str] = set()
-        self.session = requests.Session()
+        # MinHash signatures of recent stories, used to reject repeats and near-repeats
+        self.used_stories: Deque[array] = deque(maxlen=RECENT_STORIES_TRACKED)
+        self.session = _ollama_session
+
+        # Answer totals not yet written to the player's account (flushed once per round)
+        self.pending_answered = 0
+        self.pending_correct = 0
+
+        # The most recently generated story, tokenized once for word counts and question generation
+        self.current_story = ""
+        self.current_story_words: List[str] = []
+        # (story, spaCy Doc) for the last story analysed, shared by every lookup on that story
+        self._story_doc = None
+        # (story, extracted elements) for the last story, shared by the quiz prompt and the fallback quiz
+        self._story_elements = None
 
         # Sensible defaults for the game
         self.story_word_limit = 150
         self.num_questions_per_round = 3
 
+    def __getstate__(self) -> Dict:
+        """
+        Returns the picklable game state, leaving out the HTTP session so games can be stored in Redis.
+        """
+        state = self.__dict__.copy()
+        state.pop('session', None)
+        state.pop('_story_doc', None)
+        state.pop('_story_elements', None)
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        """
+        Restores a pickled game and reattaches it to the shared HTTP session.
+        """
+        self.__dict__.update(state)
+        self.session = _ollama_session
+        self._story_doc = None
+        self._story_elements = None
+
+    def record_answer(self, is_correct: bool) -> None:
+        """
+        Updates the score for an answered question and buffers the account totals
+        until they are flushed to the database at the end of the round.
+        """
+        if is_correct:
+            self.score += 1
+            self.pending_correct += 1
+        self.questions_answered += 1
+        self.pending_answered += 1
+
+    def to_status_dict(self) -> Dict:
+        """
+        Returns the score fields reported by the web API.
+        """
+        return {
+            'score': self.score,
+            'questions_answered': self.questions_answered,
+            'level': None,
+            'level_score': None,
+        }
+
+    def reset(self) -> None:
+        """
+        Resets the game state to its initial values.
+        """
+        self.score = 0
+        self.questions_answered = 0
+        self.used_stories.clear()
+
     def check_ollama_connection(self) -> bool:
         """
         Checks if the Ollama service is running and accessible.
+        The result is cached and shared across games (see OllamaHealth).
         """
-        try:
-            r = self.session.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-            return r.status_code == 200
-        except requests.RequestException:
-            return False
+        return ollama_health.check()
 
     def generate_with_ollama(self, prompt: str, max_tokens: int = 200) -> str:
         """
@@ -88,17 +430,134 @@ class OllamaStoryQuizGame:
         """
         try:
             payload = {
-                "model": self.model_name, "prompt": prompt, "stream": False,
+                "model": self.model_name, "prompt": prompt, "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE,
                 "options": {"num_predict": max_tokens, "temperature": 0.7, "top_p": 0.9}
             }
             response = self.session.post(self.ollama_api_url, json=payload, timeout=60)
             response.raise_for_status()
+            ollama_health.record(True)
             # The expected JSON has a "response" field; this might need adjustment if the endpoint differs
-            result = response.json().get("response", "")
+            result = _json_loads(response.content).get("response", "")
             return result.strip() if result else ""
+        except requests.ConnectionError:
+            ollama_health.record(False)
+            return ""
         except Exception:
             return ""
 
+    def generate_with_ollama_stream(self, prompt: str, max_tokens: int = 200) -> Iterator[str]:
+        """
+        Generates text using Ollama's streaming API, yielding each fragment as soon as the model produces it.
+        Errors are raised to the caller.
+        """
+        payload = {
+            "model": self.model_name, "prompt": prompt, "stream": True, "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {"num_predict": max_tokens, "temperature": 0.7, "top_p": 0.9}
+        }
+        try:
+            response = self.session.post(self.ollama_api_url, json=payload, timeout=60, stream=True)
+        except requests.ConnectionError:
+            ollama_health.record(False)
+            raise
+        with response:
+            response.raise_for_status()
+            ollama_health.record(True)
+            # Ollama streams one JSON object per line, each carrying the next piece of text
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = _json_loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    def collect_ollama_stream(self, prompt: str, max_tokens: int = 200, stop: Optional[threading.Event] = None,
+                              is_complete: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Streams a generation from Ollama and returns its text, like generate_with_ollama.
+        The stream is closed as soon as the stop event is set, returning "", so an attempt that lost a race
+        stops generating. is_complete is called with the finished lines each time a line ends, and can end
+        the generation early once the text holds what is needed.
+        """
+        parts: List[str] = []
+        stream = self.generate_with_ollama_stream(prompt, max_tokens)
+        try:
+            for fragment in stream:
+                if stop is not None and stop.is_set():
+                    return ""
+                parts.append(fragment)
+                if is_complete is None or '\n' not in fragment:
+                    continue
+                text = ''.join(parts)
+                if is_complete(text[:text.rindex('\n')]):
+                    break
+        except Exception:
+            return ""
+        finally:
+            stream.close()
+        return ''.join(parts).strip()
+
+    def generate_quiz_text_stream(self, prompt: str, num_questions: int, max_tokens: int = 400,
+                                  stop: Optional[threading.Event] = None) -> str:
+        """
+        Streams a quiz from Ollama and returns the text as soon as it holds num_questions complete
+        questions, closing the stream instead of waiting for the rest of the generation.
+        """
+        # Only finished lines are parsed, so a half-streamed answer line is never counted
+        return self.collect_ollama_stream(
+            prompt, max_tokens, stop, lambda lines: len(self.parse_quiz_questions(lines)) >= num_questions
+        )
+
+    def _remember_story(self, story: str) -> str:
+        """
+        Records the story being served this round and splits it into words once, so callers
+        can reuse the word list instead of re-splitting the same text.
+        """
+        self.current_story = story
+        self.current_story_words = story.split()
+        return story
+
+    def _story_words(self, story: str) -> List[str]:
+        """
+        Returns the words of a story, reusing the cached split when it is the current story.
+        """
+        if story == self.current_story:
+            return self.current_story_words
+        return story.split()
+
+    def _get_doc(self, story: str):
+        """
+        Returns the spaCy Doc for a story, parsing it only once however many lookups need it.
+        """
+        if self._story_doc is None or self._story_doc[0] != story:
+            self._story_doc = (story, nlp(story))
+        return self._story_doc[1]
+
+    def _story_signature(self, story: str) -> array:
+        """
+        Fingerprints a story as a MinHash signature of its overlapping 5-word phrases.
+        crc32 is used instead of hash() so signatures stay comparable after a game is
+        pickled into Redis and loaded by another worker process.
+        """
+        tokens = _LOWER_WORD_RE.findall(story.lower())
+        if len(tokens) < 5:
+            shingles = {zlib.crc32(' '.join(tokens).encode())}
+        else:
+            shingles = {zlib.crc32(' '.join(tokens[i:i + 5]).encode()) for i in range(len(tokens) - 4)}
+        # Minimums are kept to their low 32 bits; two different minimums agree on those by chance only rarely
+        return array('I', (min((a * s + b) % _MINHASH_PRIME for s in shingles) & 0xFFFFFFFF
+                           for a, b in _MINHASH_PARAMS))
+
+    def _is_repeat_story(self, signature: array) -> bool:
+        """
+        Checks whether a story's estimated phrase overlap with one of the recent stories is too high.
+        """
+        for seen in self.used_stories:
+            if sum(x == y for x, y in zip(signature, seen)) / MINHASH_SIZE > STORY_SIMILARITY_THRESHOLD:
+                return True
+        return False
+
     def _truncate_story(self, story: str, word_limit: int) -> str:
         """
         Truncates a story to a specified word limit, ensuring it ends at a sentence boundary if possible.
@@ -114,62 +573,85 @@ class OllamaStoryQuizGame:
 
     def generate_story_stream(self, prompt: str, ollama_max_tokens: int) -> Iterator[str]:
         """
-        Generates a story and yields it character by character for a streaming effect on the frontend.
+        Streams a story to the frontend while Ollama is still generating it.
+        Text is released a sentence at a time, so the story can be cut at the word limit on a
+        sentence boundary without taking back anything that was already sent.
         """
+        word_limit = self.story_word_limit
+        story = ""
+        sent = 0
+        word_count = 0
         try:
-            raw = self.generate_with_ollama(prompt, max_tokens=ollama_max_tokens)
-            final_story = self._truncate_story(raw, self.story_word_limit) if raw else self.get_fallback_story()
-            for ch in final_story:
-                yield ch
-                time.sleep(0.01)
+            for fragment in self.generate_with_ollama_stream(prompt, ollama_max_tokens):
+                if not story:
+                    fragment = fragment.lstrip()
+                    if not fragment:
+                        continue
+                # A fragment that continues the previous word doesn't start a new one
+                word_count += len(fragment.split())
+                if story and not story[-1].isspace() and not fragment[0].isspace():
+                    word_count -= 1
+                story += fragment
+
+                if word_count > word_limit:
+                    # Cut at the last sentence end within the word limit, like _truncate_story
+                    limit_end = next(itertools.islice(_WORD_RE.finditer(story), word_limit - 1, None)).end()
+                    last_period = story.rfind('.', 0, limit_end)
+                    story = story[:last_period + 1] if last_period != -1 else story[:limit_end] + "..."
+                    break
+
+                last_period = story.rfind('.')
+                if last_period + 1 > sent:
+                    yield story[sent:last_period + 1]
+                    sent = last_period + 1
         except Exception:
-            yield "Error: Could not generate story."
+            pass  # Keep whatever was generated before the stream failed
+
+        story = story.rstrip()
+        if story:
+            if len(story) > sent:
+                yield story[sent:]
+        else:
+            # Ollama produced nothing; stream a fallback story in fixed-size slices
+            story = self.get_fallback_story()
+            for i in range(0, len(story), STREAM_CHUNK_SIZE):
+                yield story[i:i + STREAM_CHUNK_SIZE]
+        self._remember_story(story)
 
     # -------------------------
     # Helpers
     # -------------------------
-    def _safe_sample(self, pool: List[str], k: int, fallback_pool: List[str]) -> List[str]:
+    def _safe_sample(self, pool: Sequence[str], k: int, fallback_pool: Sequence[str]) -> List[str]:
         """
         Safely samples k items from a pool, falling back to another pool if the first is too small.
         """
-        pool = [p for p in pool if p and str(p).strip() != ""]
-        seen = set()
-        pool = [x for x in pool if not (x in seen or seen.add(x))]
+        # The module-level decoy tuples are already free of blanks and duplicates
+        if isinstance(pool, tuple) and k <= len(pool):
+            return random.sample(pool, k)
+        # dict.fromkeys drops duplicates while keeping the original order
+        pool = list(dict.fromkeys(p for p in pool if p and str(p).strip() != ""))
         if len(pool) >= k:
             return random.sample(pool, k)
-        result = pool.copy()
+        result = pool
+        result_set = set(result)
         for item in fallback_pool:
             if len(result) >= k:
                 break
-            if item not in result:
+            if item not in result_set:
                 result.append(item)
+                result_set.add(item)
         while len(result) < k:
             result.append("None")
         return result
 
-    def _normalize_text(self, txt: str) -> str:
+    def _assemble_mcq(self, correct: str, decoys: List[str]) -> Tuple[Dict[str, str], str]:
         """
-        Normalizes text by stripping whitespace, removing punctuation, and converting to lowercase.
-        Uses lemmatization if spaCy is available.
+        Puts the correct answer in a random slot among three shuffled decoys, returning the options and the correct key.
         """
-        if not txt:
-            return ""
-        s = txt.strip()
-        s = re.sub(r'[^\w\s]', '', s)
-        s = re.sub(r'\s+', ' ', s).strip().lower()
-        try:
-            if nlp:
-                doc = nlp(s)
-                lemmas = [tok.lemma_ for tok in doc if tok.lemma_]
-                if lemmas:
-                    return ' '.join(lemmas).lower()
-        except Exception:
-            pass
-        if s.endswith('ed'):
-            return s[:-2]
-        if s.endswith('ing'):
-            return s[:-3]
-        return s
+        slot = random.randrange(4)
+        choices = random.sample(decoys[:3], len(decoys[:3]))
+        choices.insert(slot, correct)
+        return dict(zip(ANSWER_LETTERS, choices)), ANSWER_LETTERS[slot]
 
     def _action_by_main_character(self, story: str, main_character: str) -> Optional[str]:
         """
@@ -178,17 +660,15 @@ class OllamaStoryQuizGame:
         if not nlp or not main_character:
             return None
         try:
-            doc = nlp(story)
+            doc = self._get_doc(story)
             target_names = {main_character.split()[0].lower()}
             for ent in doc.ents:
                 if ent.label_ == "PERSON" and main_character.lower() in ent.text.lower():
                     target_names.add(ent.text.split()[0].lower())
-            for sent in doc.sents:
-                for token in sent:
-                    if token.pos_ == "VERB":
-                        for child in token.children:
-                            if child.dep_ in ("nsubj", "nsubjpass") and child.text.lower() in target_names:
-                                return token.lemma_.lower()
+            # One pass over the subjects: the first one naming the character gives the action
+            for token in doc:
+                if token.dep_ in ("nsubj", "nsubjpass") and token.head.pos_ == "VERB" and token.text.lower() in target_names:
+                    return token.head.lemma_.lower()
             return None
         except Exception:
             return None
@@ -204,61 +684,53 @@ class OllamaStoryQuizGame:
         if not txt:
             return []
 
+        # Scan the lines once; a "Question" header line closes the block before it
         questions = []
-        lines = [ln.rstrip() for ln in txt.replace('\r', '').split('\n')]
-        blocks = []
-        current = []
-        for line in lines:
-            if re.match(r'^\s*Question\b', line, re.I) and current:
-                blocks.append(current)
-                current = [line]
-            else:
-                current.append(line)
-        if current:
-            blocks.append(current)
-
-        option_re = re.compile(r'^\s*([A-D])\s*[\)\.\:]\s*(.+)$', re.I)
-        answer_re_list = [
-            re.compile(r'Correct Answer\s*[:\-]?\s*([A-D])', re.I),
-            re.compile(r'Correct\s*[:\-]?\s*([A-D])', re.I),
-            re.compile(r'Answer\s*[:\-]?\s*([A-D])', re.I)
-        ]
-
-        for block in blocks:
-            b_lines = [l for l in block if l and l.strip() != '']
-            if not b_lines:
+        block_lines: List[str] = []     # every non-empty line of the current block
+        question_lines: List[str] = []  # lines before the block's first option
+        options: Dict[str, str] = {}
+        for line in txt.replace('\r', '').split('\n'):
+            line = line.rstrip()
+            if _QUESTION_HDR_RE.match(line) and block_lines:
+                question = self._build_parsed_question(block_lines, question_lines, options)
+                if question:
+                    questions.append(question)
+                block_lines, question_lines, options = [], [], {}
+            if not line.strip():
                 continue
-            opt_idx = None
-            for i, l in enumerate(b_lines):
-                if option_re.match(l):
-                    opt_idx = i
-                    break
-            if opt_idx is None:
-                continue
-            question_text = ' '.join(b_lines[:opt_idx]).strip()
-            question_text = re.sub(r'^\s*Question\s*\d*\s*[:\-]?\s*', '', question_text, flags=re.I).strip()
-            options = {}
-            for l in b_lines[opt_idx:]:
-                m = option_re.match(l)
-                if m:
-                    key = m.group(1).upper()
-                    val = re.sub(r'\s+', ' ', m.group(2).strip())
-                    options[key] = val
-            correct_letter = None
-            block_text = '\n'.join(b_lines)
-            for are in answer_re_list:
-                am = are.search(block_text)
-                if am:
-                    correct_letter = am.group(1).upper()
-                    break
-            if question_text and len(options) == 4 and correct_letter and correct_letter in options:
-                questions.append({
-                    'question': question_text,
-                    'options': options,
-                    'correct': correct_letter
-                })
+            block_lines.append(line)
+            m = _OPTION_RE.match(line)
+            if m:
+                options[m.group(1).upper()] = _WS_RE.sub(' ', m.group(2).strip())
+            elif not options:
+                question_lines.append(line)
+        question = self._build_parsed_question(block_lines, question_lines, options)
+        if question:
+            questions.append(question)
         return questions
 
+    def _build_parsed_question(self, block_lines: List[str], question_lines: List[str], options: Dict[str, str]) -> Optional[Dict]:
+        """
+        Turns one scanned question block into a question dict, or None if the block is incomplete.
+        """
+        if not options:
+            return None
+        question_text = _QUESTION_PREFIX_RE.sub('', ' '.join(question_lines).strip()).strip()
+        correct_letter = None
+        block_text = '\n'.join(block_lines)
+        for are in _ANSWER_RES:
+            am = are.search(block_text)
+            if am:
+                correct_letter = am.group(1).upper()
+                break
+        if question_text and len(options) == 4 and correct_letter and correct_letter in options:
+            return {
+                'question': question_text,
+                'options': options,
+                'correct': correct_letter
+            }
+        return None
+
     # -------------------------
     # Fallbacks
     # -------------------------
@@ -316,13 +788,14 @@ class OllamaStoryQuizGame:
         ]
         story_starter = random.choice(story_starters)
         setting = random.choice(settings)
-        random_seed = random.randint(1000, 9999)
         keyword_guidance = ""
         if random.random() < 0.6:
             keyword_object = random.choice(OBJECT_WORDS)
             keyword_place = random.choice(PLACE_WORDS)
             keyword_guidance = f"Try to include an object like a '{keyword_object}' and a place like a '{keyword_place}' in the story."
-        prompt = f"""{story_starter} {setting}. {keyword_guidance}
+
+        def build_prompt(random_seed: int) -> str:
+            return f"""{story_starter} {setting}. {keyword_guidance}
 Make the story approximately {self.story_word_limit} words. Use creative characters and unique plot events. Include specific names, objects, and actions. Seed: {random_seed}
 
 Requirements:
@@ -330,85 +803,115 @@ Requirements:
 - Safe for school environment
 - Include specific character names
 - Have a clear beginning, middle, and end"""
-        for attempt in range(3):
-            story = self.generate_with_ollama(prompt, max_tokens=self.story_word_limit + 100)
-            if story:
-                story_hash = str(hash(story))
-                if story_hash not in self.used_stories:
-                    self.used_stories.add(story_hash)
-                    return self._truncate_story(story, self.story_word_limit)
-            time.sleep(1)
-        return self.get_fallback_story()
+
+        # Run three attempts with different seeds at once and keep the first new story to arrive,
+        # rather than retrying one after another; the stop event ends the other streams once a winner is found
+        stop = threading.Event()
+        futures = [
+            _ollama_executor.submit(self.collect_ollama_stream, build_prompt(random.randint(1000, 9999)),
+                                    self.story_word_limit + 100, stop)
+            for _ in range(3)
+        ]
+        try:
+            for future in as_completed(futures):
+                story = future.result()
+                if story:
+                    signature = self._story_signature(story)
+                    if not self._is_repeat_story(signature):
+                        self.used_stories.append(signature)
+                        return self._remember_story(self._truncate_story(story, self.story_word_limit))
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+        return self._remember_story(self.get_fallback_story())
 
     def extract_story_elements(self, story: str) -> Dict:
         """
         Extracts specific elements from the story for question generation.
         This is safe to call even if the story is None or empty.
+        The result for the last story is reused, so it is only computed once per round.
         """
-        if not story:
-            story = ""
+        story = story or ""
+        if self._story_elements is None or self._story_elements[0] != story:
+            self._story_elements = (story, self._extract_story_elements(story))
+        return self._story_elements[1]
 
-        # Split sentences safely
-        sentences = re.split(r'[.!?]+', story)
-        sentences = [s.strip() for s in sentences if s and s.strip()]
+    def _extract_story_elements(self, story: str) -> Dict:
+        """
+        Does the work for extract_story_elements.
+        """
 
-        # Simple name pattern and fallback NER if available
-        name_pattern = r'\b[A-Z][a-z]{2,}\b'
-        potential_names = re.findall(name_pattern, story or "")
+        # Collect the first few sentences in one pass; only six are ever used
+        sentences = []
+        for m in _SENTENCE_RE.finditer(story):
+            sentence = m.group().strip()
+            if sentence:
+                sentences.append(sentence)
+                if len(sentences) == 6:
+                    break
 
-        # Collect names using spaCy if available
+        # Simple name pattern and fallback NER if available. The sentence, name and word scans stay as
+        # separate compiled-regex passes: each runs in C, which beats dispatching every token in Python.
+        potential_names = _NAME_RE.findall(story or "")
+
+        # Collect names using spaCy if available. This reads the story's shared full parse rather than a
+        # separate NER-only run: the verb lookups below need that parse anyway, so one pass is cheaper.
         names = []
         if nlp and story:
             try:
-                doc = nlp(story)
+                doc = self._get_doc(story)
                 names = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
             except Exception:
                 names = []
 
         # Combine heuristics with small safeguards
-        common_words = {
-            'The', 'This', 'That', 'They', 'Then', 'There', 'These', 'Those',
-            'When', 'Where', 'What', 'Who', 'Why', 'How', 'And', 'But', 'Or',
-            'So', 'For', 'As', 'At', 'By', 'In', 'On', 'To', 'With', 'From', 'A', 'An',
-        }
-        titles = {
-            'Agent', 'Captain', 'Commander', 'Dame', 'Detective', 'Dr', 'General', 'King',
-            'Lady', 'Lord', 'Miss', 'Mr', 'Mrs', 'Ms', 'Officer', 'Prince', 'Princess',
-            'Professor', 'Queen', 'Sergeant', 'Sir'
-        }
-
         combined_names = set(names)
-        for i, word in enumerate(potential_names):
-            if word in titles and i + 1 < len(potential_names):
-                full_name = f"{word} {potential_names[i+1]}"
-                combined_names.add(full_name)
-            elif word not in common_words:
-                combined_names.add(word)
+        combined_names.update(f"{a} {b}" for a, b in zip(potential_names, potential_names[1:]) if a in NAME_TITLES)
+        combined_names.update(w for w in potential_names if w not in NAME_STOPWORDS and w not in NAME_TITLES)
 
-        names = sorted(list(combined_names), key=len, reverse=True)
+        # Longest names first (a titled full name beats a bare first name); the first is the main character
+        names = sorted(combined_names, key=lambda n: (-len(n), n))
 
         # Verbs/actions via spaCy lemma if available
         action_words = []
         if nlp and story:
             try:
-                doc = nlp(story)
+                doc = self._get_doc(story)
                 action_words = [token.lemma_ for token in doc if token.pos_ == "VERB" and token.dep_ != 'aux']
             except Exception:
                 action_words = []
 
-        # Objects/places detection using the constant lists; use lowercased story safely
+        # Objects/places detection using the constant lists; whole words only, so "cat" doesn't match "cathedral"
         story_lower = (story or "").lower()
-        objects = [obj for obj in OBJECT_WORDS if obj in story_lower]
-        places = [place for place in PLACE_WORDS if place in story_lower]
-
+        tokens = set(_LOWER_WORD_RE.findall(story_lower))
+        tokens.update([t[:-1] for t in tokens if t.endswith('s')])  # count "keys" as "key"
+        objects = list(tokens & OBJECT_SET)
+        places = list(tokens & PLACE_SET) + [place for place in MULTIWORD_PLACES if place in story_lower]
+
+        story_words = self._story_words(story)
+        first_sentence = sentences[0] if sentences else ""
+        first_words = first_sentence.split()
+        names = names[:5]
+        objects = list(set(objects))[:5]
+        places = list(set(places))[:5]
+        # Elements confirmed to appear in the story, with their lowercase forms computed once
+        mentioned = [m for m in objects + places + names if m and m.lower() in story_lower]
         return {
-            'names': list(set(names))[:5],
+            'names': names,
             'actions': list(set(action_words))[:5],
-            'objects': list(set(objects))[:5],
-            'places': list(set(places))[:5],
-            'sentences': sentences[:6],
-            'first_sentence': sentences[0] if sentences else "",
-            'story_words': (story or "").split()
+            'objects': objects,
+            'places': places,
+            'mentioned': mentioned,
+            'mentioned_lower': [m.lower() for m in mentioned],
+            'sentences': sentences,
+            'first_sentence': first_sentence,
+            # Opening words for the "which phrase opens the story" question; empty if the sentence is too short
+            'opening_phrase': ' '.join(first_words[:4]) if len(first_words) > 2 else "",
+            'story_words': story_words,
+            'word_count': len(story_words),
+            'story_text_lower': story_lower,
+            'story_words_set': frozenset(tokens)
         }
 
     # -------------------------
@@ -425,25 +928,13 @@ Requirements:
 
         def make_mcq(correct_text: str, decoy_pool: List[str], fallback_pool: List[str], title_case: bool = False):
             """Helper function to create a multiple-choice question."""
-            decoys = self._safe_sample([d for d in decoy_pool if d and d.lower() != correct_text.lower()], 3, fallback_pool)
-            opts = [correct_text] + decoys
-            random.shuffle(opts)
-            if title_case:
-                opts_display = [o.title() if isinstance(o, str) else str(o) for o in opts]
-            else:
-                opts_display = [str(o) for o in opts]
-            options = {chr(65 + i): opts_display[i] for i in range(4)}
-            norm_correct = self._normalize_text(correct_text)
-            correct_key = None
-            for k, v in options.items():
-                if self._normalize_text(v) == norm_correct or norm_correct in self._normalize_text(v) or self._normalize_text(v) in norm_correct:
-                    correct_key = k
-                    break
-            if not correct_key:
-                idx = opts.index(correct_text)
-                correct_key = chr(65 + idx)
-            return options, correct_key
+            correct_lower = correct_text.lower()
+            decoys = self._safe_sample([d for d in decoy_pool if d and d.lower() != correct_lower], 3, fallback_pool)
+            display = (lambda o: o.title() if isinstance(o, str) else str(o)) if title_case else str
+            # The key comes from the slot the correct answer was placed in, never from matching option text
+            return self._assemble_mcq(display(correct_text), [display(d) for d in decoys])
 
+        # (generator, element keys it needs) pairs; generators whose elements are empty are never called
         candidate_generators = []
 
         # -- Question Generator Functions --
@@ -453,34 +944,17 @@ Requirements:
             if not names:
                 return None
             main = names[0]
-            if main.lower() in used_elements:
+            main_lower = main.lower()
+            if main_lower in used_elements:
                 return None
-            used_elements.add(main.lower())
-            decoy_names = [
-                'Aarav', 'Aditi', 'Advik', 'Aisha', 'Alex', 'Anika', 'Arjun', 'Aryan',
-                'Ava', 'Benjamin', 'Caleb', 'Casey', 'Charlotte', 'Chloe', 'Cyrus',
-                'Daniel', 'David', 'Diya', 'Elena', 'Elijah', 'Emily', 'Emma', 'Ethan',
-                'Finn', 'Freya', 'Gabriel', 'Grace', 'Harper', 'Henry', 'Ishan',
-                'Isabella', 'Jack', 'James', 'Jasper', 'Jordan', 'Julian', 'Kai',
-                'Kavya', 'Krish', 'Leo', 'Liam', 'Lily', 'Logan', 'Lucas', 'Luna',
-                'Madison', 'Mason', 'Mateo', 'Maya', 'Meera', 'Mia', 'Michael',
-                'Morgan', 'Nitya', 'Noah', 'Nora', 'Oliver', 'Olivia', 'Om', 'Owen',
-                'Penelope', 'Priya', 'Rahul', 'Riley', 'River', 'Riya', 'Rohan',
-                'Sage', 'Sam', 'Samuel', 'Shaan', 'Siya', 'Sofia', 'Sophia', 'Taylor',
-                'Vihaan', 'Vivaan', 'William', 'Wyatt', 'Zara', 'Zoe'
-            ]
-            opts, key = make_mcq(main, decoy_names, decoy_names, title_case=True)
+            used_elements.add(main_lower)
+            opts, key = make_mcq(main, DECOY_NAMES, DECOY_NAMES, title_case=True)
             return {
-                'question': random.choice([
-                    "Who is the main character in the story?",
-                    "Which character is central to the tale?",
-                    "Who does the story follow?",
-                    "Which of the following characters appears in the story?"
-                ]),
+                'question': random.choice(NAME_QUESTIONS),
                 'options': opts,
                 'correct': key
             }
-        candidate_generators.append(q_name)
+        candidate_generators.append((q_name, ('names',)))
 
         def q_action():
             # ... (code for generating a question about a key action)
@@ -495,28 +969,17 @@ Requirements:
                 main_action = actions[0]
             if not main_action:
                 return None
-            if main_action.lower() in used_elements:
+            action_lower = main_action.lower()
+            if action_lower in used_elements:
                 return None
-            used_elements.add(main_action.lower())
-            decoy_actions = [
-                'argued', 'built', 'calculated', 'climbed', 'cooked', 'cried', 'danced',
-                'decoded', 'drew', 'dreamed', 'escaped', 'flew', 'laughed', 'listened',
-                'meditated', 'negotiated', 'painted', 'played', 'programmed', 'ran',
-                'read', 'repaired', 'sang', 'shouted', 'slept', 'studied', 'surrendered',
-                'swam', 'teleported', 'trained', 'traveled', 'waited', 'walked',
-                'whispered', 'worked', 'wrote', 'stepped', 'entered', 'invited'
-            ]
-            opts, key = make_mcq(main_action, decoy_actions, decoy_actions, title_case=True)
+            used_elements.add(action_lower)
+            opts, key = make_mcq(main_action, DECOY_ACTIONS, DECOY_ACTIONS, title_case=True)
             return {
-                'question': random.choice([
-                    "What is a key action that takes place in the story?",
-                    "Which of these actions is described in the narrative?",
-                    "What did someone in the story do?"
-                ]),
+                'question': random.choice(ACTION_QUESTIONS),
                 'options': opts,
                 'correct': key
             }
-        candidate_generators.append(q_action)
+        candidate_generators.append((q_action, ('actions',)))
 
         def q_object():
             # ... (code for generating a question about an object)
@@ -524,25 +987,17 @@ Requirements:
             if not objs:
                 return None
             main_obj = objs[0]
-            if main_obj.lower() in used_elements:
+            obj_lower = main_obj.lower()
+            if obj_lower in used_elements:
                 return None
-            used_elements.add(main_obj.lower())
-            decoy_objs = [
-                'amulet', 'compass', 'crystal', 'key', 'lantern', 'map', 'mirror', 'orb',
-                'potion', 'ring', 'scroll', 'staff', 'sword', 'talisman', 'treasure chest',
-                'vial', 'wand', 'journal', 'relic'
-            ]
-            opts, key = make_mcq(main_obj, decoy_objs, decoy_objs, title_case=True)
+            used_elements.add(obj_lower)
+            opts, key = make_mcq(main_obj, DECOY_OBJECTS, DECOY_OBJECTS, title_case=True)
             return {
-                'question': random.choice([
-                    "Which important object is mentioned in the story?",
-                    "What item plays a role in the narrative?",
-                    "Which of these objects appears in the tale?"
-                ]),
+                'question': random.choice(OBJECT_QUESTIONS),
                 'options': opts,
                 'correct': key
             }
-        candidate_generators.append(q_object)
+        candidate_generators.append((q_object, ('objects',)))
 
         def q_place():
             # ... (code for generating a question about the setting)
@@ -550,28 +1005,17 @@ Requirements:
             if not places:
                 return None
             main_place = places[0]
-            if main_place.lower() in used_elements:
+            place_lower = main_place.lower()
+            if place_lower in used_elements:
                 return None
-            used_elements.add(main_place.lower())
-            decoy_places = [
-                'desert', 'ocean', 'jungle', 'space station', 'volcano', 'swamp', 'canyon',
-                'meadow', 'tundra', 'castle', 'temple', 'city', 'laboratory', 'mansion',
-                'market', 'mine', 'observatory', 'palace', 'ruins', 'tower', 'harbor',
-                'factory'
-            ]
-            opts, key = make_mcq(main_place, decoy_places, decoy_places, title_case=True)
+            used_elements.add(place_lower)
+            opts, key = make_mcq(main_place, DECOY_PLACES, DECOY_PLACES, title_case=True)
             return {
-                'question': random.choice([
-                    "Where does the story take place?",
-                    "What is the primary setting of the story?",
-                    "Which location is described in the narrative?",
-                    "The story is set in which of these locations?",
-                    "What is the backdrop for this tale?"
-                ]),
+                'question': random.choice(PLACE_QUESTIONS),
                 'options': opts,
                 'correct': key
             }
-        candidate_generators.append(q_place)
+        candidate_generators.append((q_place, ('places',)))
 
         def q_sequence():
             # ... (code for generating a question about the sequence of events)
@@ -584,34 +1028,14 @@ Requirements:
                 w = p.split()
                 return ' '.join(w[:10]) + ('...' if len(w) > 10 else '')
             opts_list = [short(first), short(second)]
-            decoy_pool = [
-                "They found a glowing key", "A ship sailed away", "A mysterious letter arrived",
-                "The village celebrated", "A bell began to ring", "The sun hid behind clouds",
-                "A storm began to brew", "The hero made a plan", "A map was discovered",
-                "The door creaked open", "A secret was revealed", "They started their journey",
-                "A strange sound was heard", "The group took a rest", "A decision was made",
-                "An old enemy appeared"
-            ]
-            decoys = self._safe_sample(decoy_pool, 2, decoy_pool)
-            options = [opts_list[0], opts_list[1], decoys[0], decoys[1]]
-            random.shuffle(options)
-            options_dict = {chr(65 + i): options[i] for i in range(4)}
-            correct_key = None
-            for k, v in options_dict.items():
-                if v == opts_list[0]:
-                    correct_key = k
-                    break
+            decoys = self._safe_sample(DECOY_EVENTS, 2, DECOY_EVENTS)
+            options_dict, correct_key = self._assemble_mcq(opts_list[0], [opts_list[1]] + decoys)
             return {
-                'question': random.choice([
-                    "Which of the following happened first in the story?",
-                    "What event comes earliest in the narrative?",
-                    "How does the story begin?",
-                    "Which event marks the start of the story?"
-                ]),
+                'question': random.choice(SEQUENCE_QUESTIONS),
                 'options': options_dict,
                 'correct': correct_key
             }
-        candidate_generators.append(q_sequence)
+        candidate_generators.append((q_sequence, ('sentences',)))
 
         def q_true_false():
             # ... (code for generating a true/false question)
@@ -623,10 +1047,10 @@ Requirements:
             action = elements.get('actions', [None])[0]
             if obj:
                 stmt = f"{subj} discovered a {obj}."
-                correct_answer = "True" if obj.lower() in ' '.join(elements.get('story_words', [])).lower() else "False"
+                correct_answer = "True" if obj.lower() in elements.get('story_text_lower', '') else "False"
             elif action:
                 stmt = f"{subj} {action} in the story."
-                correct_answer = "True" if action.lower() in ' '.join(elements.get('story_words', [])).lower() else "False"
+                correct_answer = "True" if action.lower() in elements.get('story_text_lower', '') else "False"
             else:
                 return None
             options = {'A': 'True', 'B': 'False', 'C': 'Maybe', 'D': 'Not stated'}
@@ -636,43 +1060,30 @@ Requirements:
                 'options': options,
                 'correct': correct_key
             }
-        candidate_generators.append(q_true_false)
+        candidate_generators.append((q_true_false, ('names',)))
 
         def q_not_mentioned():
             # ... (code for generating a "which was not mentioned" question)
-            story_text = ' '.join(elements.get('story_words', [])).lower()
-            decoy_candidates = [
-                'spaceship', 'glacier', 'police station', 'motorcycle', 'astronaut', 'market',
-                'jewel', 'statue', 'bridge', 'robot', 'scepter', 'chronometer'
+            story_text = elements.get('story_text_lower', '')
+            story_words_set = elements.get('story_words_set', frozenset())
+            not_mentioned_pool = [
+                d for d in NOT_MENTIONED_DECOYS
+                if (d not in story_text if ' ' in d else d not in story_words_set)
             ]
-            mentioned_candidates = elements.get('objects', []) + elements.get('places', []) + elements.get('names', [])
-            mentioned = [m for m in mentioned_candidates if m and m.lower() in story_text]
-            not_mentioned_pool = [d for d in decoy_candidates if d.lower() not in story_text]
             if not not_mentioned_pool:
                 return None
-            correct_item = self._safe_sample(not_mentioned_pool, 1, decoy_candidates)[0]
-            other_pool = [m for m in mentioned if m] + not_mentioned_pool
-            other_pool = [o for o in other_pool if o.lower() != correct_item.lower()]
-            others = self._safe_sample(other_pool, 3, decoy_candidates)
-            opts = [correct_item] + others
-            random.shuffle(opts)
-            opts_dict = {chr(65 + i): opts[i].title() for i in range(4)}
-            correct_key = None
-            for k, v in opts_dict.items():
-                if v.lower() == correct_item.lower():
-                    correct_key = k
-                    break
-            if not correct_key:
-                correct_key = 'A'
+            # The decoys are all lowercase, so they compare with the mentioned elements' lowercase forms as-is
+            correct_item = self._safe_sample(not_mentioned_pool, 1, NOT_MENTIONED_DECOYS)[0]
+            other_pool = [m for m, m_lower in zip(elements.get('mentioned', []), elements.get('mentioned_lower', [])) if m_lower != correct_item]
+            other_pool += [d for d in not_mentioned_pool if d != correct_item]
+            others = self._safe_sample(other_pool, 3, NOT_MENTIONED_DECOYS)
+            opts_dict, correct_key = self._assemble_mcq(correct_item.title(), [o.title() for o in others])
             return {
-                'question': random.choice([
-                    "Which of the following is NOT mentioned in the story?",
-                    "Which item/place/character did the story NOT mention?"
-                ]),
+                'question': random.choice(NOT_MENTIONED_QUESTIONS),
                 'options': opts_dict,
                 'correct': correct_key
             }
-        candidate_generators.append(q_not_mentioned)
+        candidate_generators.append((q_not_mentioned, ()))
 
         def q_inference():
             # ... (code for generating an inference question)
@@ -683,7 +1094,7 @@ Requirements:
             sents = elements.get('sentences', [])
             reason = None
             for s in sents:
-                if 'because' in s.lower() or 'so that' in s.lower() or 'to' in s.lower():
+                if _REASON_RE.search(s):
                     reason = s
                     break
             if not reason:
@@ -693,28 +1104,19 @@ Requirements:
             verb_like = elements.get('actions', [None])[0]
             if not verb_like:
                 return None
-            decoy_reasons = [
-                "To find treasure", "To escape danger", "To meet a friend",
-                "To learn a secret", "To show off", "By accident", "Because they were told to"
-            ]
-            correct_reason = "To explore" if any(w in reason.lower() for w in ['explor', 'discover', 'find', 'enter', 'step']) else "Because they had to"
-            choices = [correct_reason] + self._safe_sample(decoy_reasons, 3, decoy_reasons)
-            random.shuffle(choices)
-            opts = {chr(65 + i): choices[i] for i in range(4)}
-            correct_key = next((k for k, v in opts.items() if v == correct_reason), 'A')
+            correct_reason = "To explore" if _EXPLORE_RE.search(reason) else "Because they had to"
+            opts, correct_key = self._assemble_mcq(correct_reason, self._safe_sample(DECOY_REASONS, 3, DECOY_REASONS))
             return {
-                'question': random.choice([
-                    f"Why did {subj} do what they did in the story?",
-                    f"What is the most likely reason {subj} acted as they did?"
-                ]),
+                'question': random.choice(INFERENCE_QUESTIONS).format(subj=subj),
                 'options': opts,
                 'correct': correct_key
             }
-        candidate_generators.append(q_inference)
+        candidate_generators.append((q_inference, ('names', 'actions', 'sentences')))
 
-        # Shuffle and generate questions until the required number is met
-        random.shuffle(candidate_generators)
-        for gen in candidate_generators:
+        # Shuffle the usable generators and generate questions until the required number is met
+        usable_generators = [gen for gen, needs in candidate_generators if all(elements.get(k) for k in needs)]
+        random.shuffle(usable_generators)
+        for gen in usable_generators:
             if len(questions) >= num_needed:
                 break
             try:
@@ -734,59 +1136,47 @@ Requirements:
         # Clean up questions to ensure they are well-formed
         cleaned = []
         for q in questions[:num_needed]:
-            opts = q.get('options', {})
+            opts = q.get('options') or {}
+            if len(opts) == 4 and q.get('correct') in opts:
+                cleaned.append(q)  # Already well-formed, which is the usual case
+                continue
             if len(opts) != 4:
                 vals = list(opts.values())[:4]
                 while len(vals) < 4:
                     vals.append("Not stated")
-                opts = {chr(65 + i): vals[i] for i in range(4)}
+                opts = dict(zip(ANSWER_LETTERS, vals))
                 q['options'] = opts
-                if 'correct' not in q or q['correct'] not in opts:
-                    q['correct'] = 'A'
+            if q.get('correct') not in opts:
+                q['correct'] = 'A'
             cleaned.append(q)
-        return cleaned[:num_needed]
+        return cleaned
 
     def create_contextual_question(self, story: str, elements: Dict, used_elements: set) -> Optional[Dict]:
         """
         Generates contextual questions as a fallback, ensuring there are always questions available.
         """
-        first_sentence = (elements.get('first_sentence') or "")
-        story_words = elements.get('story_words') or []
-        story_text_lower = ' '.join(story_words).lower()
+        first_phrase = elements.get('opening_phrase', "")
+        word_count = elements.get('word_count', 0)
+        story_words_set = elements.get('story_words_set', frozenset())
 
         # 1) Beginning phrase (if available)
-        if first_sentence:
-            words = (first_sentence or "").split()
-            if len(words) > 2:
-                first_phrase = ' '.join(words[:4])
-                decoys = [
-                    "On a stormy night", "Deep within the forest", "It was the silence",
-                    "In a faraway land", "Long ago, in a kingdom", "No one expected this"
-                ]
-                choices = [first_phrase] + self._safe_sample(decoys, 3, decoys)
-                random.shuffle(choices)
-                opts = {chr(65 + i): choices[i] for i in range(4)}
-                correct = next((k for k, v in opts.items() if v == first_phrase), 'A')
-                if first_phrase.lower() not in used_elements:
-                    used_elements.add(first_phrase.lower())
-                    return {
-                        'question': "Which phrase opens the story?",
-                        'options': opts,
-                        'correct': correct
-                    }
+        if first_phrase and first_phrase.lower() not in used_elements:
+            used_elements.add(first_phrase.lower())
+            opts, correct = self._assemble_mcq(first_phrase, self._safe_sample(OPENING_DECOYS, 3, OPENING_DECOYS))
+            return {
+                'question': "Which phrase opens the story?",
+                'options': opts,
+                'correct': correct
+            }
 
         # 2) Word-count / length estimate (if story long enough)
-        word_count = len(story_words)
         if word_count > 40:
-            ranges = [
-                f"About {word_count} words",
+            wrong_ranges = [
                 f"About {max(10, word_count - 40)} words",
                 f"About {word_count + 30} words",
                 f"About {max(10, word_count + 60)} words"
             ]
-            random.shuffle(ranges)
-            opts = {chr(65 + i): ranges[i] for i in range(4)}
-            correct = next((k for k, v in opts.items() if str(word_count) in v), 'A')
+            opts, correct = self._assemble_mcq(f"About {word_count} words", wrong_ranges)
             return {
                 'question': "Approximately how long is this story?",
                 'options': opts,
@@ -794,15 +1184,12 @@ Requirements:
             }
 
         # 3) Which of these is NOT mentioned? (fallback)
-        possible_not = ['spaceship', 'museum', 'robot', 'castle', 'river', 'key', 'lantern', 'dragon', 'market']
-        not_mentioned = [w for w in possible_not if w not in story_text_lower]
+        # All of these are single words, so the story's word set answers membership directly
+        not_mentioned = [w for w in CONTEXT_NOT_MENTIONED if w not in story_words_set]
         if len(not_mentioned) >= 1:
-            correct_choice = self._safe_sample(not_mentioned, 1, possible_not)[0]
-            other_choices = self._safe_sample([w for w in possible_not if w.lower() != correct_choice.lower()], 3, possible_not)
-            options = [correct_choice] + other_choices
-            random.shuffle(options)
-            opts = {chr(65 + i): options[i].title() for i in range(4)}
-            correct_key = next((k for k, v in opts.items() if v.lower() == correct_choice.lower()), 'A')
+            correct_choice = self._safe_sample(not_mentioned, 1, CONTEXT_NOT_MENTIONED)[0]
+            other_choices = self._safe_sample([w for w in CONTEXT_NOT_MENTIONED if w != correct_choice], 3, CONTEXT_NOT_MENTIONED)
+            opts, correct_key = self._assemble_mcq(correct_choice.title(), [o.title() for o in other_choices])
             return {
                 'question': "Which of these is NOT mentioned in the story?",
                 'options': opts,
@@ -824,23 +1211,30 @@ Requirements:
         """
         Displays the story in the console.
         """
-        print("\n" + "=" * 60 + "\nYOUR STORY\n" + "=" * 60)
-        print(story)
-        print("\n" + "=" * 60)
+        rule = "=" * 60
+        print(f"\n{rule}\nYOUR STORY\n{rule}\n{story}\n\n{rule}")
 
     def ask_quiz_question(self, question_data: Dict, question_num: int) -> bool:
         """
         Asks a quiz question in the console and returns whether the answer was correct.
         """
-        print(f"\nQUESTION {question_num}\n" + "-" * 40)
-        print(question_data['question'])
-        for letter, option in question_data['options'].items():
-            print(f"{letter}) {option}")
-        while True:
-            answer = input("\nYour answer (A, B, C, or D): ").upper().strip()
-            if answer in ['A', 'B', 'C', 'D']:
-                break
-            print("Please enter A, B, C, or D")
+        # Write the whole question in one call rather than a print per line
+        lines = [f"\nQUESTION {question_num}", "-" * 40, question_data['question']]
+        lines.extend(f"{letter}) {option}" for letter, option in question_data['options'].items())
+        print("\n".join(lines))
+        if _can_read_keys():
+            # Take the answer from a single keypress, ignoring any other keys
+            print("\nYour answer (A, B, C, or D): ", end="", flush=True)
+            answer = _getch().upper()
+            while answer not in ANSWER_LETTERS:
+                answer = _getch().upper()
+            print(answer)
+        else:
+            while True:
+                answer = input("\nYour answer (A, B, C, or D): ").upper().strip()
+                if answer in ['A', 'B', 'C', 'D']:
+                    break
+                print("Please enter A, B, C, or D")
         is_correct = (answer == question_data.get('correct', '').upper())
         if is_correct:
             print("✅ Correct! Well done!")
@@ -871,9 +1265,20 @@ Requirements:
                     correct = self.ask_quiz_question(q, idx)
                     if correct:
                         round_correct += 1
-                print("\n" + "-" * 40)
-                print(f"Round complete — you answered {round_correct}/{len(questions)} correctly.")
-                print(f"Total score: {self.score} (questions answered: {self.questions_answered})")
+                print(f"\n{'-' * 40}\n"
+                      f"Round complete — you answered {round_correct}/{len(questions)} correctly.\n"
+                      f"Total score: {self.score} (questions answered: {self.questions_answered})")
+                if _can_read_keys():
+                    # Enter or Y plays on, N quits; other keys are ignored
+                    print("\nPlay another round? (Y/n): ", end="", flush=True)
+                    key = _getch().lower()
+                    while key not in ("\r", "\n", "y", "n"):
+                        key = _getch().lower()
+                    print("n" if key == "n" else "y")
+                    if key == "n":
+                        print("\nThanks for playing! Final score:", self.score)
+                        return
+                    continue
                 while True:
                     cont = input("\nPlay another round? (Y/n): ").strip().lower()
                     if cont in ("", "y", "yes"):
@@ -918,12 +1323,46 @@ C) [option]
 D) [option]
 Correct Answer: [A-D]
 """
-        for attempt in range(3):
-            quiz_text = self.generate_with_ollama(quiz_prompt, max_tokens=400)
-            parsed_questions = self.parse_quiz_questions(quiz_text)
-            if len(parsed_questions) == num_questions:
-                return parsed_questions
-            time.sleep(1)
+        cache_key = hashlib.blake2b(f"{self.model_name}\0{quiz_prompt}".encode(), digest_size=16).hexdigest()
+        cached = _quiz_cache.get(cache_key)
+        if cached is not None:
+            # Mark it recently used, so quizzes for stories that keep coming back (like the fallbacks) stay cached
+            try:
+                _quiz_cache.move_to_end(cache_key)
+            except KeyError:
+                pass  # Another thread evicted it first
+            return [{**q, 'options': dict(q['options'])} for q in cached]
+        if not ollama_health.check():
+            return self.get_fallback_quiz(story)
+
+        for race in range(2):
+            # Stream three attempts at once and keep the first that parses into a full quiz;
+            # the stop event ends the other streams once a winner is found
+            stop = threading.Event()
+            futures = [_ollama_executor.submit(self.generate_quiz_text_stream, quiz_prompt, num_questions, 400, stop)
+                       for _ in range(3)]
+            got_text = False
+            try:
+                for future in as_completed(futures):
+                    quiz_text = future.result()
+                    got_text = got_text or bool(quiz_text)
+                    parsed_questions = self.parse_quiz_questions(quiz_text)[:num_questions]
+                    if len(parsed_questions) == num_questions:
+                        _quiz_cache[cache_key] = [{**q, 'options': dict(q['options'])} for q in parsed_questions]
+                        if len(_quiz_cache) > QUIZ_CACHE_SIZE:
+                            try:
+                                _quiz_cache.popitem(last=False)
+                            except KeyError:
+                                pass  # Another thread evicted it first
+                        return parsed_questions
+            finally:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+            # Replies that only failed to parse aren't retried; three tries already ran side by side
+            if got_text or race == 1 or not ollama_health.check():
+                break
+            time.sleep(QUIZ_RETRY_DELAY + random.uniform(0, 0.05))
         return self.get_fallback_quiz(story)
 
 
@@ -931,6 +1370,39 @@ class OllamaStoryQuizGameWithLevels(OllamaStoryQuizGame):
     """
     An advanced version of the game with progressive levels, longer stories, and hints.
     """
+    has_levels = True
+
+    # Story prompt pieces, built once for the class; starters are filled in with the genre
+    STORY_STARTERS = (
+        "Write a captivating {genre} story",
+        "Create an engaging {genre} tale",
+        "Tell an exciting {genre} adventure",
+        "Craft a thrilling {genre} narrative",
+        "Compose a unique {genre} saga",
+        "Weave a new {genre} legend",
+        "Imagine an original {genre} chronicle",
+    )
+    STORY_SETTINGS = (
+        "in a forgotten library full of whispering books",
+        "in a magical garden where flowers sing at dawn",
+        "in a mysterious forest under a perpetual twilight",
+        "in a quiet, snow-covered village on the edge of the world",
+        "in a secret underground laboratory filled with strange devices",
+        "in a spooky, abandoned mansion on a windswept hill",
+        "on a futuristic space station orbiting a distant star",
+        "aboard a creaky pirate ship on the high seas",
+        "within a bustling cyberpunk city under neon lights",
+        "in a hidden valley where dinosaurs still roam",
+        "at a grand masquerade ball with a secret agenda",
+    )
+    # (minimum level, writing complexity), highest level first
+    COMPLEXITY_BY_LEVEL = (
+        (15, "sophisticated language and multi-layered storylines"),
+        (10, "advanced vocabulary and intricate plot twists"),
+        (5, "moderate vocabulary with some complex sentences"),
+        (1, "simple vocabulary and straightforward plot"),
+    )
+
     def __init__(self, model_name: str = "gemma:2b", genre: str = "adventure", start_level: int = 1):
         """
         Initializes the advanced game with level-specific parameters.
@@ -944,6 +1416,33 @@ class OllamaStoryQuizGameWithLevels(OllamaStoryQuizGame):
         self.num_questions_per_round = 3 + ((start_level -1) // 5)
 
 
+    def record_answer(self, is_correct: bool) -> None:
+        """
+        Updates the score for an answered question, also counting correct answers towards the level.
+        """
+        super().record_answer(is_correct)
+        if is_correct:
+            self.level_score += 1
+
+    def to_status_dict(self) -> Dict:
+        """
+        Returns the score fields reported by the web API, including level progress.
+        """
+        status = super().to_status_dict()
+        status['level'] = self.level
+        status['level_score'] = self.level_score
+        return status
+
+    def reset(self) -> None:
+        """
+        Resets the game state, returning the player to level 1.
+        """
+        super().reset()
+        self.level = 1
+        self.level_score = 0
+        self.story_word_limit = 100
+        self.num_questions_per_round = 3
+
     def advance_level(self) -> bool:
         """
         Advances the player to the next level, increasing difficulty and awarding hints.
@@ -966,45 +1465,12 @@ class OllamaStoryQuizGameWithLevels(OllamaStoryQuizGame):
         """
         Generates a story with complexity based on the current level.
         """
-        story_starters = [
-            f"Write a captivating {self.genre} story",
-            f"Create an engaging {self.genre} tale",
-            f"Tell an exciting {self.genre} adventure",
-            f"Craft a thrilling {self.genre} narrative",
-            f"Compose a unique {self.genre} saga",
-            f"Weave a new {self.genre} legend",
-            f"Imagine an original {self.genre} chronicle",
-        ]
-        settings = [
-            "in a forgotten library full of whispering books",
-            "in a magical garden where flowers sing at dawn",
-            "in a mysterious forest under a perpetual twilight",
-            "in a quiet, snow-covered village on the edge of the world",
-            "in a secret underground laboratory filled with strange devices",
-            "in a spooky, abandoned mansion on a windswept hill",
-            "on a futuristic space station orbiting a distant star",
-            "aboard a creaky pirate ship on the high seas",
-            "within a bustling cyberpunk city under neon lights",
-            "in a hidden valley where dinosaurs still roam",
-            "at a grand masquerade ball with a secret agenda",
-        ]
-
-        complexity_levels = {
-            1: "simple vocabulary and straightforward plot",
-            5: "moderate vocabulary with some complex sentences",
-            10: "advanced vocabulary and intricate plot twists",
-            15: "sophisticated language and multi-layered storylines"
-        }
-        # Determine complexity based on level, defaulting to the simplest for level 1.
-        # This ensures complexity gradually increases in a stable way.
-        if self.level >= 15: complexity_key = 15
-        elif self.level >= 10: complexity_key = 10
-        elif self.level >= 5: complexity_key = 5
-        else: complexity_key = 1
-        complexity = complexity_levels[complexity_key]
+        # Complexity steps up at fixed levels, defaulting to the simplest below level 5
+        complexity = next((text for min_level, text in self.COMPLEXITY_BY_LEVEL if self.level >= min_level),
+                          self.COMPLEXITY_BY_LEVEL[-1][1])
 
-        setting = random.choice(settings)
-        story_starter = random.choice(story_starters)
+        setting = random.choice(self.STORY_SETTINGS)
+        story_starter = random.choice(self.STORY_STARTERS).format(genre=self.genre)
         random_seed = random.randint(1000, 9999)
         keyword_guidance = ""
         
@@ -1020,7 +1486,7 @@ Ensure a clear beginning, middle, and end. Seed: {random_seed}"""
 
         raw_story = self.generate_with_ollama(prompt, max_tokens=self.story_word_limit + 100)
         story = self._truncate_story(raw_story, self.story_word_limit) if raw_story else ""
-        return story if story else self.get_fallback_story()
+        return self._remember_story(story if story else self.get_fallback_story())
 
 
 if __name__ == "__main__":
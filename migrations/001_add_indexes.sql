@@ -0,0 +1,13 @@
+-- Indexes for the per-user lookups made on every login, game start and profile view.
+-- Run once against the quiz_game database:
+--   mysql -u root -p quiz_game < migrations/001_add_indexes.sql
+
+-- Covers the "latest level" lookup in /api/start-game and MAX(level) in /profile.
+-- Both queries are answered from the index alone, with no filesort.
+CREATE INDEX idx_user_progress_user_level ON user_progress (user_id, level DESC);
+
+-- Covers the "last 5 games" query on the profile page.
+CREATE INDEX idx_game_history_user_played ON game_history (user_id, played_at DESC);
+
+-- Makes the login lookup a single B-tree seek and guarantees usernames stay unique.
+CREATE UNIQUE INDEX idx_accounts_username ON accounts (username);
@@ -0,0 +1,17 @@
+-- Denormalized highest level per account, so the leaderboard no longer has to
+-- GROUP BY over every user_progress row.
+-- Run once against the quiz_game database after 001_add_indexes.sql:
+--   mysql -u root -p quiz_game < migrations/002_accounts_highest_level.sql
+
+ALTER TABLE accounts
+    ADD COLUMN highest_level INT NOT NULL DEFAULT 0,
+    ADD INDEX idx_accounts_highest_level (highest_level DESC, username);
+
+-- Backfill from the existing progress history.
+UPDATE accounts a
+JOIN (
+    SELECT user_id, MAX(level) AS highest_level
+    FROM user_progress
+    GROUP BY user_id
+) up ON up.user_id = a.id
+SET a.highest_level = up.highest_level;
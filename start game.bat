@@ -3,6 +3,9 @@ rem This batch file starts the AI Quiz Game.
 
 echo Starting Ollama server in the background...
 
+rem Let Ollama serve several generations at once; the game races parallel story attempts.
+set OLLAMA_NUM_PARALLEL=3
+
 rem Use start /B to run ollama serve without opening a new window and waiting for it to finish.
 start /B ollama serve
 